@@ -0,0 +1,89 @@
+#!usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@author: xyl
+@file:  DumpCodec.py
+@time: 2026/10/17
+"""
+# 对比旧 dump 格式（json indent=2 + json.load）与 DumpCodec 各压缩方式的写入/读取吞吐量和磁盘占用
+# 用法: python -m Benchmark.DumpCodec
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from Core.DumpCodec import DumpCodec, decode_dump, encode_dump
+
+FILES = 200
+
+
+def sample_json() -> dict:
+    # 模拟列表页接口返回
+    items = [{'id': i, 'title': f'招标公告-{i} 关于某某项目的采购公告', 'url': f'https://example.com/detail/{i}',
+              'publish_time': '2026-10-17 09:00:00', 'amount': i * 1000.5, 'tags': ['工程', '采购', '公告'],
+              'region': {'province': '河南省', 'city': '郑州市'}} for i in range(200)]
+    return {'code': 200, 'total': 200, 'data': items}
+
+
+def sample_text() -> str:
+    return '<html><body>' + ''.join(f'<div class="item"><a href="/d/{i}">公告 {i}</a><span>2026-10-17</span></div>'
+                                    for i in range(500)) + '</body></html>'
+
+
+def bench(name: str, codec, file_name: str, res, res_type: str):
+    folder = tempfile.mkdtemp()
+    try:
+        start_time = time.perf_counter()
+        for i in range(FILES):
+            with open(os.path.join(folder, f'{i}{file_name}'), 'wb') as f:
+                f.write(encode_dump(res, res_type, codec))
+        write_seconds = time.perf_counter() - start_time
+        size = sum(os.path.getsize(os.path.join(folder, f)) for f in os.listdir(folder))
+        start_time = time.perf_counter()
+        for i in range(FILES):
+            with open(os.path.join(folder, f'{i}{file_name}'), 'rb') as f:
+                decode_dump(f.read(), file_name)
+        read_seconds = time.perf_counter() - start_time
+    finally:
+        shutil.rmtree(folder)
+    print(f"{name:<14} {FILES / write_seconds:>10.0f} {FILES / read_seconds:>10.0f} {size / FILES / 1024:>10.1f}")
+
+
+def bench_legacy_json(res):
+    # 现有实现：json.dump(indent=2) 写入、json.load 读取
+    folder = tempfile.mkdtemp()
+    try:
+        start_time = time.perf_counter()
+        for i in range(FILES):
+            with open(os.path.join(folder, f'{i}.json'), 'w', encoding='utf-8') as f:
+                json.dump(res, f, ensure_ascii=False, indent=2)
+        write_seconds = time.perf_counter() - start_time
+        size = sum(os.path.getsize(os.path.join(folder, f)) for f in os.listdir(folder))
+        start_time = time.perf_counter()
+        for i in range(FILES):
+            with open(os.path.join(folder, f'{i}.json'), 'r', encoding='utf-8') as f:
+                json.load(f)
+        read_seconds = time.perf_counter() - start_time
+    finally:
+        shutil.rmtree(folder)
+    print(f"{'legacy':<14} {FILES / write_seconds:>10.0f} {FILES / read_seconds:>10.0f} {size / FILES / 1024:>10.1f}")
+
+
+def main():
+    codecs = [('orjson', DumpCodec('none')), ('orjson+gzip', DumpCodec('gzip')), ('orjson+zstd', DumpCodec('zstd'))]
+    header = f"{'codec':<14} {'write/s':>10} {'read/s':>10} {'KB/file':>10}"
+    print(f"json ({FILES} files)\n{header}")
+    res = sample_json()
+    bench_legacy_json(res)
+    for name, codec in codecs:
+        bench(name, codec, '.json', res, 'json')
+    print(f"\ntext ({FILES} files)\n{header}")
+    res = sample_text()
+    bench('legacy', None, '.html', res, 'text')
+    for name, codec in codecs:
+        bench(name.replace('orjson', 'utf8'), codec, '.html', res, 'text')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+#!usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@author: xyl
+@file:  EncodingDetect.py
+@time: 2026/10/17
+"""
+# 对比 response.apparent_encoding（整个响应体检测）与 EncodingDetector（响应头/前缀检测/按 host 缓存）的耗时
+# 用法: python -m Benchmark.EncodingDetect
+import time
+
+from requests.models import Response
+
+from Core.Encoding import EncodingDetector
+
+ROUNDS = 20
+
+
+def make_response(body: bytes, content_type: str, url: str = 'https://example.com/page') -> Response:
+    response = Response()
+    response._content = body
+    response.headers['Content-Type'] = content_type
+    response.url = url
+    response.status_code = 200
+    return response
+
+
+def cases() -> dict:
+    html = '<html><head><title>列表页</title></head><body>' + '<div class="item">中文内容 item</div>' * 20000
+    html += '</body></html>'
+    return {
+        'header charset (utf-8)': ('text/html; charset=utf-8', html.encode('utf-8')),
+        'meta charset (gbk)': ('text/html', html.replace('<head>', '<head><meta charset="gbk">').encode('gbk')),
+        'no charset (gbk)': ('text/html', html.encode('gbk')),
+    }
+
+
+def bench(func) -> float:
+    start_time = time.perf_counter()
+    for _ in range(ROUNDS):
+        func()
+    return (time.perf_counter() - start_time) / ROUNDS * 1000
+
+
+def main():
+    print(f"{'case':<24} {'size':>8} {'apparent ms':>12} {'detector ms':>12} {'cached ms':>10}")
+    for name, (content_type, body) in cases().items():
+        apparent = bench(lambda: make_response(body, content_type).apparent_encoding)
+        # 每轮新建检测器，不命中 host 缓存
+        detector = bench(lambda: EncodingDetector().resolve(make_response(body, content_type)))
+        shared = EncodingDetector()
+        shared.resolve(make_response(body, content_type))
+        cached = bench(lambda: shared.resolve(make_response(body, content_type)))
+        print(f"{name:<24} {len(body) // 1024:>6}KB {apparent:>12.2f} {detector:>12.2f} {cached:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+#!usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@author: xyl
+@file:  Http2Transport.py
+@time: 2026/10/17
+"""
+# 对比 requests（HTTP/1.1 连接池）与 Http2Pool（HTTP/2 多路复用）在同一 host 高并发下的吞吐量和连接数
+# 本地分别启动 HTTP/1.1 和 h2c 服务端，每个响应固定延迟 LATENCY 秒，模拟接口的服务端耗时
+# 用法: python -m Benchmark.Http2Transport
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import h2.config
+import h2.connection
+import h2.events
+
+from Core.HttpSession import Http2Pool, SessionPool
+
+REQUESTS = 800
+WORKERS = 64
+LATENCY = 0.02
+BODY = json.dumps({'code': 200, 'data': [{'id': i, 'title': f'招标公告-{i}'} for i in range(20)]},
+                  ensure_ascii=False).encode('utf-8')
+
+
+class Http1Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # 响应头和响应体合并发送，避免 Nagle + 延迟 ACK 拖慢 HTTP/1.1 一侧
+    wbufsize = 1 << 16
+    disable_nagle_algorithm = True
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        with self.lock:
+            Http1Handler.connections += 1
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        time.sleep(LATENCY)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+
+class H2Protocol(asyncio.Protocol):
+    connections = 0
+
+    def __init__(self):
+        self.conn = h2.connection.H2Connection(config=h2.config.H2Configuration(client_side=False))
+        self.transport = None
+
+    def connection_made(self, transport):
+        H2Protocol.connections += 1
+        self.transport = transport
+        self.conn.initiate_connection()
+        self.transport.write(self.conn.data_to_send())
+
+    def data_received(self, data):
+        for event in self.conn.receive_data(data):
+            if isinstance(event, h2.events.RequestReceived):
+                asyncio.ensure_future(self.respond(event.stream_id))
+            elif isinstance(event, h2.events.ConnectionTerminated):
+                self.transport.close()
+        self.transport.write(self.conn.data_to_send())
+
+    async def respond(self, stream_id: int):
+        await asyncio.sleep(LATENCY)
+        self.conn.send_headers(stream_id, [(':status', '200'), ('content-type', 'application/json'),
+                                           ('content-length', str(len(BODY)))])
+        # 等待客户端的 WINDOW_UPDATE，避免超出流量控制窗口
+        while self.conn.local_flow_control_window(stream_id) < len(BODY):
+            await asyncio.sleep(0.001)
+        self.conn.send_data(stream_id, BODY, end_stream=True)
+        self.transport.write(self.conn.data_to_send())
+
+
+def start_http1() -> str:
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Http1Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f'http://127.0.0.1:{server.server_port}/api/search'
+
+
+def start_h2() -> str:
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(loop.create_server(H2Protocol, '127.0.0.1', 0))
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return f'http://127.0.0.1:{server.sockets[0].getsockname()[1]}/api/search'
+
+
+def bench(name: str, request, url: str, connections):
+    before = connections()
+    with ThreadPoolExecutor(WORKERS) as executor:
+        # 预热，建立连接
+        list(executor.map(lambda i: request(url, i), range(WORKERS)))
+        start_time = time.perf_counter()
+        responses = list(executor.map(lambda i: request(url, i), range(REQUESTS)))
+        seconds = time.perf_counter() - start_time
+    assert all(response.status_code == 200 and response.content == BODY for response in responses)
+    print(f"{name:<24} {REQUESTS / seconds:>10.0f} {seconds:>10.2f} {connections() - before:>12}")
+
+
+def main():
+    http1_url, h2_url = start_http1(), start_h2()
+    print(f"{REQUESTS} requests, {WORKERS} threads, server latency {LATENCY * 1000:.0f} ms")
+    print(f"{'transport':<24} {'req/s':>10} {'seconds':>10} {'connections':>12}")
+    for pool_maxsize in (4, WORKERS):
+        pool = SessionPool(pool_maxsize=pool_maxsize)
+        bench(f'requests (pool {pool_maxsize})',
+              lambda url, i: pool.request('GET', url, params={'page': i}, timeout=30), http1_url,
+              lambda: Http1Handler.connections)
+        pool.close()
+    http2_pool = Http2Pool(max_connections=1, prior_knowledge=True)
+    bench('h2 (1 connection)', lambda url, i: http2_pool.request('GET', url, params={'page': i}, timeout=30), h2_url,
+          lambda: H2Protocol.connections)
+    http2_pool.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+#!usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@author: xyl
+@file:  MongoThreadScaling.py
+@time: 2026/10/17
+"""
+# 对比 CollectionWrapper 加锁模式与 lock_free 模式下吞吐量随线程数的变化
+# 用法: python -m Benchmark.MongoThreadScaling  （需要 config.yaml 中配置的 MongoDB 可用）
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from loguru import logger
+
+from Core.Config import MONGO_URI
+from Core.MongoDB import MongoDB
+
+BENCH_DB = 'EasyJobBench'
+BENCH_COLLECTION = 'thread_scaling'
+OPS_PER_RUN = 4000
+THREAD_COUNTS = (1, 2, 4, 8, 16, 32)
+
+
+def _work(collection, i):
+    # 一次写入 + 一次按 key 读取，模拟 ThreadRun 工作线程保存并回查结果
+    collection.save_dict_to_collection({'key': i, 'value': 'x' * 64}, 'key')
+    collection.find_documents(query={'key': i}, limit=1)
+
+
+def run_once(lock_free: bool, threads: int) -> float:
+    db = MongoDB(uri=MONGO_URI, db_name=BENCH_DB, log_enabled=False, lock_free=lock_free)
+    collection = db[BENCH_COLLECTION]
+    collection.collection.drop()
+    collection.collection.create_index([('key', 1)])
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(lambda i: _work(collection, i), range(OPS_PER_RUN)))
+    elapsed = time.perf_counter() - start_time
+    collection.collection.drop()
+    db.close()
+    return OPS_PER_RUN / elapsed
+
+
+def main():
+    logger.remove()  # 关闭查询日志，避免日志输出影响吞吐量
+    print(f"{'threads':>8} {'locked ops/s':>14} {'lock_free ops/s':>16} {'speedup':>8}")
+    for threads in THREAD_COUNTS:
+        locked = run_once(lock_free=False, threads=threads)
+        lock_free = run_once(lock_free=True, threads=threads)
+        print(f"{threads:>8} {locked:>14.0f} {lock_free:>16.0f} {lock_free / locked:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,256 @@
+#!usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@author: xyl
+@file:  AsyncFetcher.py
+@time: 2026/10/17
+"""
+import asyncio
+import queue
+import threading
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, NamedTuple, Optional, Union
+
+import httpx
+from requests.utils import select_proxy
+
+# 请求描述支持的字段及默认值，与 JobBase.download_page 的参数一致
+SPEC_DEFAULTS = {
+    'url': None,
+    'method': 'GET',
+    'params': None,
+    'data': None,
+    'json_data': None,
+    'headers': None,
+    'cookies': None,
+    'timeout': 30,
+    'encoding': None,
+    'allow_redirects': True,
+    'proxies': None,
+    'dump_file_name': None,
+    'res_type': 'text',
+    'read_dump': True,
+    'raise_for_status': True,
+    'validate_str_list': None,
+    'retry_count': None,
+    'cache': None,
+    'cache_ttl': None,
+    'proxy_session': None,
+    'transport': None,
+}
+
+_END = object()
+
+
+class FetchResult(NamedTuple):
+    spec: Union[str, dict]  # 调用方传入的原始请求描述
+    result: Any  # 与 download_page 返回值一致，出错时为 None
+    error: Optional[BaseException]  # 重试耗尽后的异常
+
+
+class AsyncFetcher:
+    """
+    基于 asyncio + httpx 的批量抓取器
+    缓存读取、响应校验、dump 语义与 JobBase.download_page 一致；
+    同时在途的请求数（含尚未被消费的结果）不超过 concurrency，按完成顺序返回结果。
+    """
+
+    def __init__(self, job, concurrency: int = 16, retry_count: int = 3):
+        """
+        :param job: JobBase 实例，复用其 dump/get_dump、响应解析校验、编码推断、限速和重试策略
+        :param concurrency: 最大在途请求数
+        :param retry_count: 默认重试次数，可被请求描述中的 retry_count 覆盖
+        """
+        if concurrency <= 0:
+            raise ValueError("concurrency 必须大于0")
+        self.job = job
+        self.concurrency = concurrency
+        self.retry_count = retry_count
+        self._clients: Dict[tuple, httpx.AsyncClient] = {}
+
+    @staticmethod
+    def normalize(spec: Union[str, dict]) -> dict:
+        """
+        请求描述可以是 url 字符串，或 download_page 参数组成的字典
+        """
+        if isinstance(spec, str):
+            spec = {'url': spec}
+        unknown = set(spec) - set(SPEC_DEFAULTS)
+        if unknown:
+            raise ValueError(f"不支持的请求参数: {sorted(unknown)}")
+        if not spec.get('url'):
+            raise ValueError("请求描述缺少 url")
+        if spec.get('transport') not in (None, 'requests', 'h2'):
+            raise ValueError(f"不支持的 transport: {spec['transport']}")
+        return {**SPEC_DEFAULTS, **spec}
+
+    def _client(self, url: str, proxies: Optional[Dict[str, str]],
+                transport: Optional[str] = None) -> httpx.AsyncClient:
+        # httpx 的代理是客户端级别的，按代理地址和传输方式分别维护客户端；与 requests 一致按 URL 的 scheme 选择代理
+        proxy = select_proxy(url, proxies) if proxies else None
+        # 未指定时与 download_page 一致使用任务的 http_transport，h2 时走 HTTP/2 多路复用
+        http2 = (transport or self.job.http_transport) == 'h2'
+        client = self._clients.get((proxy, http2))
+        if client is None:
+            limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+            client = httpx.AsyncClient(proxy=proxy, limits=limits, http2=http2,
+                                       http1=not (http2 and self.job.http2_prior_knowledge))
+            self._clients[(proxy, http2)] = client
+        return client
+
+    async def aclose(self):
+        clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            await client.aclose()
+
+    async def _request(self, spec: dict, key: Optional[str] = None) -> httpx.Response:
+        from Core.JobBase import JobException
+
+        headers = dict(self.job._revalidation_headers(key, spec['read_dump'], spec['method'], spec['headers']) or {})
+        if spec['cookies']:
+            # httpx 已不推荐按请求传 cookies，直接拼到请求头
+            headers['Cookie'] = '; '.join(f"{k}={v}" for k, v in spec['cookies'].items())
+        rate_limiter = self.job.rate_limiter
+        try:
+            async with rate_limiter.aacquire(spec['url']):
+                with self.job._proxy_lease(spec['proxies'], spec['proxy_session']) as lease:
+                    try:
+                        response = await self._client(spec['url'], lease.proxies, spec['transport']).request(
+                            spec['method'],
+                            spec['url'],
+                            params=spec['params'],
+                            data=spec['data'],
+                            json=spec['json_data'],
+                            headers=headers,
+                            timeout=spec['timeout'],
+                            follow_redirects=spec['allow_redirects'],
+                        )
+                    except httpx.TransportError:
+                        rate_limiter.observe(spec['url'], error=True)
+                        raise
+                    lease.observe(response.status_code)
+                rate_limiter.observe(spec['url'], response.status_code, response.headers.get('Retry-After'))
+            # httpx 对 3xx 也会抛异常，条件请求的 304 交给调用方使用本地副本
+            if spec['raise_for_status'] and response.status_code != 304:
+                response.raise_for_status()
+        except httpx.HTTPError as e:
+            self.job.log.error(f"request failed: {e}")
+            raise JobException(e)
+        if spec['encoding'] is not None:
+            response.encoding = spec['encoding']
+        elif spec['res_type'] == 'text':
+            response.encoding = self.job.encoding_detector.resolve(response)
+        return response
+
+    async def _fetch_once(self, spec: dict, key: Optional[str]):
+        response = await self._request(spec, key)
+        res = await asyncio.to_thread(self.job._read_revalidated, key, spec['url'], response, spec['dump_file_name'],
+                                      spec['res_type'], spec['cache_ttl'])
+        if res is not None:
+            return res
+        # 解析、校验、dump 和写响应缓存含文件 IO，放到线程中执行
+        res = await asyncio.to_thread(self.job._handle_response, url=spec['url'], response=response,
+                                      res_type=spec['res_type'], dump_file_name=spec['dump_file_name'],
+                                      validate_str_list=spec['validate_str_list'])
+        await asyncio.to_thread(self.job._write_response_cache, key, res, spec['res_type'], spec['cache_ttl'],
+                                response)
+        return res
+
+    async def fetch(self, spec: dict):
+        """
+        抓取单个请求描述（已 normalize），返回值与 download_page 一致，重试和熔断使用任务的 retry_policy
+        """
+        if spec['read_dump'] and spec['dump_file_name'] is not None:
+            res = await asyncio.to_thread(self.job._read_dump, spec['dump_file_name'], True)
+            if res is not None:
+                return res
+        key = self.job._response_cache_key(spec['cache'], spec['method'], spec['url'], spec['params'], spec['data'],
+                                           spec['json_data'], spec['res_type'])
+        res = await asyncio.to_thread(self.job._read_response_cache, key, spec['read_dump'], spec['dump_file_name'],
+                                      spec['res_type'])
+        if res is not None:
+            return res
+        retries = self.retry_count if spec['retry_count'] is None else spec['retry_count']
+        return await self.job.retry_policy.acall(self._fetch_once, (spec, key), url=spec['url'], retries=retries)
+
+    async def _fetch_result(self, spec: Union[str, dict]) -> FetchResult:
+        try:
+            return FetchResult(spec, await self.fetch(self.normalize(spec)), None)
+        except Exception as e:
+            return FetchResult(spec, None, e)
+
+    async def iter_results(self, specs: Iterable[Union[str, dict]]) -> AsyncIterator[FetchResult]:
+        """
+        异步迭代抓取结果，按完成顺序返回；specs 按需消费，可以是生成器
+        """
+        specs = iter(specs)
+        pending = set()
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(pending) < self.concurrency:
+                    spec = next(specs, _END)
+                    if spec is _END:
+                        exhausted = True
+                        break
+                    pending.add(asyncio.ensure_future(self._fetch_result(spec)))
+                if not pending:
+                    return
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+            await self.aclose()
+
+    def iter_sync(self, specs: Iterable[Union[str, dict]]) -> Iterator[FetchResult]:
+        """
+        同步迭代抓取结果：事件循环运行在后台线程，调用方可在普通线程（如 on_run、ThreadRun）中使用
+        """
+        results = queue.Queue(maxsize=self.concurrency)
+        stopped = threading.Event()
+
+        async def pump():
+            agen = self.iter_results(specs)
+            try:
+                async for item in agen:
+                    # 消费者取走结果前不再发起新请求（背压）
+                    while not stopped.is_set():
+                        try:
+                            results.put_nowait(item)
+                            break
+                        except queue.Full:
+                            await asyncio.sleep(0.01)
+                    if stopped.is_set():
+                        return
+            finally:
+                await agen.aclose()
+
+        def run():
+            error = None
+            try:
+                asyncio.run(pump())
+            except BaseException as e:
+                error = e
+            results.put((_END, error))
+
+        thread = threading.Thread(target=run, name=f"AsyncFetcher-{self.job.job_name}", daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = results.get()
+                if isinstance(item, tuple) and len(item) == 2 and item[0] is _END:
+                    if item[1] is not None:
+                        raise item[1]
+                    return
+                yield item
+        finally:
+            stopped.set()
+            # 提前退出时清空队列，让后台线程取消在途请求并退出
+            while thread.is_alive():
+                try:
+                    results.get(timeout=0.1)
+                except queue.Empty:
+                    pass
@@ -0,0 +1,71 @@
+#!usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@author: xyl
+@file:  AsyncMongoDB.py
+@time: 2026/10/17
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from Core.MongoDB import CollectionWrapper, DocumentList
+
+
+class AsyncCollectionWrapper:
+    """
+    CollectionWrapper 的异步版本，接口与 CollectionWrapper 一致。
+    阻塞的 pymongo 调用在专用线程池中执行，不会阻塞事件循环（FastAPI 请求和 AsyncIOScheduler）。
+    """
+    # 所有异步集合共享的专用线程池，与事件循环默认线程池隔离
+    _executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix='mongo-async')
+
+    def __init__(self, wrapper: CollectionWrapper, executor: ThreadPoolExecutor = None):
+        """
+        :param wrapper: 同步的 CollectionWrapper
+        :param executor: 自定义线程池，默认使用共享的 mongo-async 线程池
+        """
+        self.wrapper = wrapper
+        self.db_name = wrapper.db_name
+        self.collection_name = wrapper.collection_name
+        self.executor = executor or self._executor
+
+    async def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    async def find_documents(self,
+                             query: dict = None,
+                             projection: dict = None,
+                             limit: int = 0,
+                             skip: int = 0,
+                             distinct_key: str = None,
+                             sort: list = None) -> Optional[DocumentList]:
+        return await self._run(self.wrapper.find_documents, query=query, projection=projection, limit=limit,
+                               skip=skip, distinct_key=distinct_key, sort=sort)
+
+    async def count(self, query: dict = None) -> int:
+        return await self._run(self.wrapper.count, query=query)
+
+    async def aggregate(self, pipeline) -> DocumentList:
+        return await self._run(self.wrapper.aggregate, pipeline)
+
+    async def update_documents(self, data_dict, query_key: str):
+        return await self._run(self.wrapper.update_documents, data_dict, query_key)
+
+    async def save_dict_to_collection(self, data_dict: dict, query_key: str = None):
+        return await self._run(self.wrapper.save_dict_to_collection, data_dict, query_key)
+
+    async def save_dict_list_to_collection(self, dict_list: List[dict], query_key: str = None,
+                                           chunk_size: int = 1000):
+        return await self._run(self.wrapper.save_dict_list_to_collection, dict_list, query_key,
+                               chunk_size=chunk_size)
+
+    async def bulk_upsert(self, dict_list: List[dict], query_key: str, chunk_size: int = 1000) -> dict:
+        return await self._run(self.wrapper.bulk_upsert, dict_list, query_key, chunk_size=chunk_size)
+
+    async def delete_documents(self, query: dict = None, skip: int = None, limit: int = None,
+                               recyclable: bool = False, drop_if_empty: bool = False, chunk_size: int = 1000):
+        return await self._run(self.wrapper.delete_documents, query=query, skip=skip, limit=limit,
+                               recyclable=recyclable, drop_if_empty=drop_if_empty, chunk_size=chunk_size)
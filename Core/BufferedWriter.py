@@ -0,0 +1,210 @@
+#!usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@author: xyl
+@file:  BufferedWriter.py
+@time: 2026/10/17
+"""
+import atexit
+import queue
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Callable, Optional, Tuple
+
+from loguru import logger
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+_FLUSH = 'flush'
+_STOP = 'stop'
+
+
+class BufferedWriter:
+    """
+    写后缓冲的批量写入器
+    多线程调用 insert/upsert 时先放入有界队列，由后台线程在达到数量或时间阈值时
+    合并成一次无序 bulk_write 写入，队列满时调用方阻塞（背压）；同一批次内 query_key 相同的 upsert 先合并，与 bulk_upsert 一致。
+    """
+    _instances = weakref.WeakSet()
+    _atexit_registered = False
+    _class_lock = threading.Lock()
+
+    def __init__(self,
+                 collection,
+                 max_batch: int = 500,
+                 flush_interval: float = 1.0,
+                 max_queue: int = 10000,
+                 on_error: Callable[[dict, dict], None] = None,
+                 log_enabled: bool = True):
+        """
+        :param collection: pymongo 集合对象
+        :param max_batch: 单次 bulk_write 的最大文档数
+        :param flush_interval: 缓冲区中最早的文档最多等待的秒数
+        :param max_queue: 队列容量，队列满时 insert/upsert 阻塞
+        :param on_error: 单个文档写入失败时的回调，参数为 (文档, 错误详情)
+        :param log_enabled: 是否记录每次批量写入的日志
+        """
+        if max_batch <= 0 or max_queue <= 0:
+            raise ValueError("max_batch 和 max_queue 必须大于0")
+        self.collection = collection
+        self.collection_info = f"{collection.database.name}:{collection.name}"
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.on_error = on_error
+        self.log_enabled = log_enabled
+        self.errors = deque(maxlen=1000)  # 最近的失败文档 {'document': ..., 'error': ...}
+        self.written = 0
+        self.failed = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._closed = False
+        # 关闭检查与入队在同一把锁内，保证 _STOP 之后不会再有文档或 flush 请求入队
+        self._state_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name=f"BufferedWriter-{self.collection_info}",
+                                        daemon=True)
+        self._thread.start()
+        with BufferedWriter._class_lock:
+            BufferedWriter._instances.add(self)
+            if not BufferedWriter._atexit_registered:
+                # 在首个写入器创建时注册，保证进程退出时先于 MongoClient 关闭执行
+                atexit.register(BufferedWriter.close_all)
+                BufferedWriter._atexit_registered = True
+
+    def insert(self, data_dict: dict, timeout: Optional[float] = None):
+        """
+        缓冲一条插入，队列满时阻塞，超过 timeout 抛出 queue.Full
+        """
+        self._put(('insert', None), data_dict, timeout)
+
+    def upsert(self, data_dict: dict, query_key: str, timeout: Optional[float] = None):
+        """
+        缓冲一条按 query_key 的 upsert，语义同 save_dict_to_collection(data_dict, query_key)
+        """
+        if data_dict.get(query_key) is None:
+            raise ValueError(f"{self.collection_info} 指定的查询键'{query_key}'在传入的记录数据中不存在或其值为None")
+        self._put(('upsert', query_key), data_dict, timeout)
+
+    def _put(self, operation: tuple, data_dict: dict, timeout: Optional[float]):
+        with self._state_lock:
+            if self._closed:
+                raise RuntimeError(f"BufferedWriter {self.collection_info} 已关闭")
+            self._queue.put((operation, dict(data_dict)), timeout=timeout)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        立即写入队列中已有的全部文档，等待写入完成
+        :return: 是否在 timeout 内完成
+        """
+        done = threading.Event()
+        with self._state_lock:
+            if self._closed or not self._thread.is_alive():
+                # 已关闭时剩余文档由 close 写入
+                return True
+            self._queue.put((_FLUSH, done), timeout=timeout)
+        return done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = None):
+        """
+        写入剩余文档并停止后台线程
+        """
+        with self._state_lock:
+            if self._closed:
+                return
+            self._closed = True
+            alive = self._thread.is_alive()
+            if alive:
+                self._queue.put((_STOP, None))
+        if alive:
+            self._thread.join(timeout)
+        if self.log_enabled or self.failed:
+            logger.info(f"BufferedWriter {self.collection_info} 已关闭, 写入 {self.written} 条, 失败 {self.failed} 条")
+
+    @classmethod
+    def close_all(cls):
+        with cls._class_lock:
+            writers = list(cls._instances)
+        for writer in writers:
+            try:
+                writer.close()
+            except Exception as e:
+                logger.exception(f"关闭 BufferedWriter 失败: {e}")
+
+    def stats(self) -> dict:
+        return {'queued': self._queue.qsize(), 'written': self.written, 'failed': self.failed}
+
+    def _run(self):
+        batch = []
+        first_at = None
+        while True:
+            timeout = None if not batch else max(0.0, self.flush_interval - (time.monotonic() - first_at))
+            try:
+                operation, payload = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                self._write(batch)
+                batch = []
+                continue
+            if operation is _FLUSH or operation is _STOP:
+                self._write(batch)
+                batch = []
+                if operation is _STOP:
+                    return
+                payload.set()
+                continue
+            if not batch:
+                first_at = time.monotonic()
+            batch.append((operation, payload))
+            if len(batch) >= self.max_batch:
+                self._write(batch)
+                batch = []
+
+    @staticmethod
+    def _operations(batch: list) -> Tuple[list, list]:
+        """
+        把缓冲的 (操作, 文档) 转换为 bulk_write 操作，同一 query_key 值的 upsert 合并为一条（后写入的字段覆盖先写入的）
+        :return: (操作列表, 每个操作对应的文档)
+        """
+        inserts, merged = [], {}
+        for (kind, query_key), data_dict in batch:
+            if kind == 'insert':
+                inserts.append(data_dict)
+            else:
+                key = (query_key, data_dict[query_key])
+                merged[key] = {**merged.get(key, {}), **data_dict}
+        operations = [InsertOne(data_dict) for data_dict in inserts]
+        documents = list(inserts)
+        for (query_key, query_value), data_dict in merged.items():
+            update_data = {k: v for k, v in data_dict.items() if k != '_id'}
+            if not update_data:
+                continue
+            operations.append(UpdateOne({query_key: query_value}, {'$set': update_data}, upsert=True))
+            documents.append(data_dict)
+        return operations, documents
+
+    def _write(self, batch: list):
+        if not batch:
+            return
+        start_time = time.perf_counter()
+        operations, documents = self._operations(batch)
+        failed_indexes = {}
+        try:
+            self.collection.bulk_write(operations, ordered=False)
+        except BulkWriteError as bwe:
+            failed_indexes = {error['index']: error for error in bwe.details.get('writeErrors', [])}
+        except Exception as e:
+            # 整批失败（如网络错误），每个文档都记为失败
+            failed_indexes = {index: {'errmsg': str(e)} for index in range(len(operations))}
+        for index, error in failed_indexes.items():
+            document = documents[index]
+            self.errors.append({'document': document, 'error': error})
+            logger.error(f"BufferedWriter {self.collection_info} 写入失败: {error.get('errmsg')}, {document}")
+            if self.on_error is not None:
+                try:
+                    self.on_error(document, error)
+                except Exception as e:
+                    logger.exception(f"BufferedWriter on_error 回调失败: {e}")
+        self.failed += len(failed_indexes)
+        self.written += len(operations) - len(failed_indexes)
+        if self.log_enabled:
+            logger.info(f"BufferedWriter {self.collection_info} 批量写入 {len(operations)} 条, "
+                        f"失败 {len(failed_indexes)} 条, 耗时: {time.perf_counter() - start_time:.6f} 秒")
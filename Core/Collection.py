@@ -61,6 +61,7 @@ class History(BaseModel):
     EndTime: str = Field(..., description="结束时间")
     Status: int = Field("", description="运行状态")
     Output: Optional[str] = Field(None, description="运行输出")
+    Stats: Optional[dict] = Field(None, description="运行统计（响应缓存命中、重试次数等）")
 
     class Config:
         json_schema_extra = {
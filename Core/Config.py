@@ -36,6 +36,8 @@ try:
     DEBUG = config.get('jobs').get('debug')
     MONGO_URI = config.get('mongo').get('uri', 'mongodb://localhost:27017')
     DB_NAME = config.get('mongo').get('database', 'EasyJob')
+    MONGO_MAX_POOL_SIZE = config.get('mongo').get('max_pool_size', 100)
+    MONGO_MIN_POOL_SIZE = config.get('mongo').get('min_pool_size', 0)
     SMTP = config.get('smtp')
     TO = config.get('smtp').get('to')
     print("[AutoImport] Success loaded config.yaml")
@@ -45,6 +47,8 @@ except Exception as e:
     MODULE_PATTERN = 'Action.py'
     MONGO_URI = 'mongodb://localhost:27017'
     DB_NAME = 'EasyJob'
+    MONGO_MAX_POOL_SIZE = 100
+    MONGO_MIN_POOL_SIZE = 0
 
 content_type_ext = {
     # 图片类
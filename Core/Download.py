@@ -0,0 +1,128 @@
+#!usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@author: xyl
+@file:  Download.py
+@time: 2026/10/17
+"""
+import hashlib
+import json
+import os
+import re
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+from loguru import logger
+
+_CONTENT_RANGE_RE = re.compile(r'bytes\s+(\d+)-(\d+)/(\d+|\*)')
+
+
+class StreamResult(NamedTuple):
+    file_name: str  # dump 文件名
+    path: Optional[str]  # 落盘路径，打包存储时为 None（通过 get_dump_view 读取）
+    size: int  # 字节数
+    sha256: str  # 内容的 sha256
+    resumed: bool  # 是否通过 Range 续传完成
+
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class ResumableDownload:
+    """
+    流式下载到 .part 文件，边写边计算 sha256，内存占用只与 chunk_size 有关
+    再次执行时（如重试）按已下载的字节数发送 Range 请求续传，并用 If-Range 确认服务端内容未变化；
+    服务端不支持续传时从头下载。
+    """
+
+    def __init__(self, part_path: str, chunk_size: int = 1024 * 1024):
+        self.part_path = part_path
+        self.meta_path = f"{part_path}.meta"
+        self.chunk_size = chunk_size
+
+    def _resume_state(self) -> Tuple[int, 'hashlib._Hash', Optional[str]]:
+        hasher = hashlib.sha256()
+        if not os.path.exists(self.part_path):
+            return 0, hasher, None
+        validator = None
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                validator = json.load(f).get('validator')
+        offset = 0
+        with open(self.part_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(self.chunk_size), b''):
+                hasher.update(chunk)
+                offset += len(chunk)
+        return offset, hasher, validator
+
+    def _save_validator(self, response):
+        # 强 ETag 或 Last-Modified 可用于 If-Range，保证续传的是同一份内容
+        etag = response.headers.get('ETag')
+        validator = etag if etag and not etag.startswith('W/') else response.headers.get('Last-Modified')
+        with open(self.meta_path, 'w', encoding='utf-8') as f:
+            json.dump({'validator': validator}, f)
+
+    def run(self, send: Callable[[Dict[str, str]], object], raise_for_status: bool = True) -> Tuple[int, str, bool]:
+        """
+        :param send: 发送请求的函数，参数为需要附加的请求头，返回 stream=True 的 requests.Response
+        :return: (字节数, sha256, 是否续传)
+        """
+        offset, hasher, validator = self._resume_state()
+        extra_headers = {}
+        if offset:
+            extra_headers['Range'] = f'bytes={offset}-'
+            if validator:
+                extra_headers['If-Range'] = validator
+        response = send(extra_headers)
+        try:
+            resumed = bool(offset) and response.status_code == 206
+            if offset and not resumed:
+                # 服务端忽略 Range 或内容已变化（If-Range 不匹配时返回 200），从头下载
+                logger.warning(f"无法续传 {response.url} (status {response.status_code})，从头下载")
+                if response.status_code == 416:
+                    response.close()
+                    response = send({})
+                offset, hasher = 0, hashlib.sha256()
+            if raise_for_status:
+                response.raise_for_status()
+            expected = self._expected_size(response, offset)
+            self._save_validator(response)
+            with open(self.part_path, 'ab' if resumed else 'wb') as f:
+                for chunk in response.iter_content(chunk_size=self.chunk_size):
+                    if chunk:
+                        f.write(chunk)
+                        hasher.update(chunk)
+                        offset += len(chunk)
+        finally:
+            response.close()
+        if expected is not None and offset != expected:
+            # 连接提前断开，保留 .part 供下次重试续传
+            raise IOError(f"下载不完整: {offset}/{expected} 字节")
+        return offset, hasher.hexdigest(), resumed
+
+    @staticmethod
+    def _expected_size(response, offset: int) -> Optional[int]:
+        if response.status_code == 206:
+            match = _CONTENT_RANGE_RE.match(response.headers.get('Content-Range', ''))
+            if match and match.group(3) != '*':
+                return int(match.group(3))
+            return None
+        # 内容经过 gzip 等编码时 Content-Length 是压缩后的长度，无法用于校验
+        if response.headers.get('Content-Encoding') not in (None, 'identity'):
+            return None
+        length = response.headers.get('Content-Length')
+        return offset + int(length) if length and length.isdigit() else None
+
+    def discard(self):
+        for path in (self.part_path, self.meta_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def finish(self, target_path: str):
+        os.replace(self.part_path, target_path)
+        if os.path.exists(self.meta_path):
+            os.remove(self.meta_path)
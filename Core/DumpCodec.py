@@ -0,0 +1,169 @@
+#!usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@author: xyl
+@file:  DumpCodec.py
+@time: 2026/10/17
+"""
+import gzip
+import json
+import threading
+from typing import Any, Optional
+
+from Core.DumpStore import res_type_of
+
+try:
+    import orjson
+except ImportError:  # 可选依赖，缺失时退回标准库 json
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:  # 可选依赖，缺失时不支持 zstd 压缩
+    zstandard = None
+
+# 文件头: 魔数(4) + 版本(1) + 压缩方式(1)；以 NUL 开头，不会与旧格式的 json/文本冲突
+MAGIC = b'\x00EJD'
+VERSION = 1
+HEADER_SIZE = len(MAGIC) + 2
+COMPRESSIONS = {'none': b'n', 'gzip': b'g', 'zstd': b'z'}
+
+_local = threading.local()
+
+
+def dumps_json(value: Any) -> bytes:
+    if orjson is not None:
+        try:
+            return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass  # orjson 不支持的类型交给标准库处理
+    return json.dumps(value, ensure_ascii=False).encode('utf-8')
+
+
+def loads_json(data: bytes) -> Any:
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass  # 如旧格式中标准库写出的 NaN/Infinity
+    return json.loads(data)
+
+
+def _zstd_compressor(level: int):
+    # zstandard 的压缩/解压对象不是线程安全的，每个线程各用一份
+    compressors = getattr(_local, 'compressors', None)
+    if compressors is None:
+        compressors = _local.compressors = {}
+    if level not in compressors:
+        compressors[level] = zstandard.ZstdCompressor(level=level)
+    return compressors[level]
+
+
+def _zstd_decompressor():
+    decompressor = getattr(_local, 'decompressor', None)
+    if decompressor is None:
+        decompressor = _local.decompressor = zstandard.ZstdDecompressor()
+    return decompressor
+
+
+class DumpCodec:
+    """
+    dump 编解码器：快速 JSON 序列化（orjson，可选）+ 可选 zstd/gzip 压缩，写入带文件头的格式
+    读取由 decode_dump 按文件头自动识别，没有文件头的旧格式文件照常读取。
+    """
+
+    def __init__(self, compression: str = 'zstd', level: Optional[int] = None, compress_content: bool = False):
+        """
+        :param compression: none / gzip / zstd
+        :param level: 压缩级别，默认 zstd 3、gzip 6
+        :param compress_content: 是否压缩 content（图片、压缩包等通常已压缩，默认不压缩）
+        """
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"不支持的 compression: {compression}")
+        if compression == 'zstd' and zstandard is None:
+            raise ImportError("zstd 压缩需要安装 zstandard")
+        self.compression = compression
+        self.level = level if level is not None else (3 if compression == 'zstd' else 6)
+        self.compress_content = compress_content
+
+    def _compress(self, data: bytes, compression: str) -> bytes:
+        if compression == 'zstd':
+            return _zstd_compressor(self.level).compress(data)
+        if compression == 'gzip':
+            return gzip.compress(data, compresslevel=self.level)
+        return data
+
+    def encode(self, res: Any, res_type: str) -> bytes:
+        if res_type == 'json':
+            body = dumps_json(res)
+        elif res_type == 'text':
+            body = str(res).encode('utf-8', errors='replace')
+        elif res_type == 'content':
+            body = bytes(res)
+        else:
+            raise ValueError(f"Invalid res_type: {res_type}. Must be one of 'text', 'json', or 'content'")
+        compression = self.compression if res_type != 'content' or self.compress_content else 'none'
+        return MAGIC + bytes([VERSION]) + COMPRESSIONS[compression] + self._compress(body, compression)
+
+
+def encode_legacy(res: Any, res_type: str) -> bytes:
+    """
+    旧格式：json 缩进 2 空格，文本 utf-8，二进制原样
+    """
+    if res_type == 'text':
+        return str(res).encode('utf-8', errors='replace')
+    if res_type == 'json':
+        return json.dumps(res, ensure_ascii=False, indent=2).encode('utf-8', errors='replace')
+    if res_type == 'content':
+        return bytes(res)
+    raise ValueError(f"Invalid res_type: {res_type}. Must be one of 'text', 'json', or 'content'")
+
+
+def encode_dump(res: Any, res_type: str, codec: Optional[DumpCodec] = None) -> bytes:
+    return codec.encode(res, res_type) if codec is not None else encode_legacy(res, res_type)
+
+
+def decode_body(data: bytes) -> bytes:
+    """
+    去掉文件头并解压，旧格式原样返回
+    """
+    if data[:len(MAGIC)] != MAGIC:
+        return data
+    compression = data[len(MAGIC) + 1:HEADER_SIZE]
+    body = data[HEADER_SIZE:]
+    if compression == COMPRESSIONS['zstd']:
+        if zstandard is None:
+            raise ImportError("读取 zstd 压缩的 dump 需要安装 zstandard")
+        return _zstd_decompressor().decompress(body)
+    if compression == COMPRESSIONS['gzip']:
+        return gzip.decompress(body)
+    return bytes(body)
+
+
+def body_view(view: memoryview) -> memoryview:
+    """
+    去掉文件头的零拷贝视图；压缩过的内容只能解压后返回
+    """
+    if bytes(view[:len(MAGIC)]) != MAGIC:
+        return view
+    if bytes(view[len(MAGIC) + 1:HEADER_SIZE]) == COMPRESSIONS['none']:
+        return view[HEADER_SIZE:]
+    return memoryview(decode_body(bytes(view)))
+
+
+def decode_dump(data: bytes, file_name: str) -> Any:
+    """
+    按文件头透明解码，返回类型与 get_dump 一致由文件扩展名决定
+    """
+    legacy = data[:len(MAGIC)] != MAGIC
+    body = decode_body(data)
+    res_type = res_type_of(file_name)
+    if res_type == 'json':
+        return loads_json(body)
+    if res_type == 'content':
+        return body
+    text = body.decode('utf-8')
+    if legacy:
+        # 旧格式以文本模式读取，保持通用换行符的转换结果
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
@@ -0,0 +1,331 @@
+#!usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@author: xyl
+@file:  DumpStore.py
+@time: 2026/10/17
+"""
+import json
+import mmap
+import os
+import sys
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from loguru import logger
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from Core.Config import content_type_ext
+
+PACKED_DIR = '_packed'
+INDEX_LOG = 'index.log'
+SEGMENT_PREFIX = 'seg-'
+LOCK_FILE = '.lock'
+
+
+def res_type_of(file_name: str) -> str:
+    """
+    按文件扩展名推断 dump 的内容类型，与 JobBase.get_dump 的规则一致
+    """
+    ext = os.path.splitext(file_name)[1].lower()
+    if ext == '.json':
+        return 'json'
+    if ext in [v.lower() for v in content_type_ext.values()]:
+        return 'content'
+    return 'text'
+
+
+@contextmanager
+def file_lock(handle):
+    """
+    对已打开的锁文件加跨进程排他锁（Linux 使用 flock，Windows 使用 msvcrt.locking）
+    """
+    if fcntl is not None:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+        return
+    handle.seek(0)
+    while True:
+        try:
+            msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+            break
+        except OSError:
+            continue  # LK_LOCK 重试 10 次后仍未拿到锁会抛出 OSError，继续等待
+    try:
+        yield
+    finally:
+        handle.seek(0)
+        msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class PackedStore:
+    """
+    追加写入的打包存储，代替一个响应一个文件
+    数据追加到 date/_packed/seg-00001.dat 等段文件，index.log 逐行记录 {name, seg, offset, size, res_type}，
+    同名记录以最后一条为准；读取通过 mmap，read_view 返回零拷贝的 memoryview。
+    多个实例/进程可同时读写同一目录：写入和压缩持有目录下 .lock 文件的排他锁，偏移取自段文件的实际大小；
+    读取前增量加载其他实例追加的索引，index.log 被压缩替换后重新加载。
+    """
+
+    def __init__(self, root: str, segment_max_bytes: int = 256 * 1024 * 1024):
+        """
+        :param root: 存储目录（通常为 folder/date/_packed）
+        :param segment_max_bytes: 单个段文件的大小上限，超过后写入新段
+        """
+        self.root = root
+        self.segment_max_bytes = segment_max_bytes
+        self._lock = threading.Lock()
+        self._index: Dict[str, dict] = {}
+        self._index_pos = 0  # index.log 已加载到的字节位置
+        self._index_ino = None  # index.log 的 inode，压缩后会变化
+        self._maps: Dict[int, mmap.mmap] = {}
+        self._stale_maps = []  # 段文件增长后重新映射，旧映射可能仍被 memoryview 引用，关闭时统一释放
+        os.makedirs(root, exist_ok=True)
+        self._lock_file = open(os.path.join(root, LOCK_FILE), 'a+b')
+        with self._lock:
+            self._refresh()
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.root, f"{SEGMENT_PREFIX}{segment:05d}.dat")
+
+    def _latest_segment(self) -> int:
+        segments = [int(name[len(SEGMENT_PREFIX):-4]) for name in os.listdir(self.root)
+                    if name.startswith(SEGMENT_PREFIX) and name.endswith('.dat')]
+        return max(segments, default=1)
+
+    def _refresh(self):
+        # 调用方需持有 self._lock；增量读取 index.log 中新增的完整行
+        index_path = os.path.join(self.root, INDEX_LOG)
+        try:
+            st = os.stat(index_path)
+        except FileNotFoundError:
+            st = None
+        ino = st.st_ino if st is not None else None
+        if ino != self._index_ino or (st is not None and st.st_size < self._index_pos):
+            # 首次加载或已被压缩替换：重新加载，旧段文件的映射作废
+            self._index, self._index_pos, self._index_ino = {}, 0, ino
+            self._stale_maps.extend(self._maps.values())
+            self._maps = {}
+        if st is None or st.st_size == self._index_pos:
+            return
+        with open(index_path, 'rb') as f:
+            f.seek(self._index_pos)
+            data = f.read()
+        complete = data.rfind(b'\n') + 1  # 最后一行可能还没写完或因中断不完整
+        for line in data[:complete].splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                logger.warning(f"忽略损坏的索引记录 {index_path}: {line[:100]!r}")
+                continue
+            if record.get('deleted'):
+                self._index.pop(record['name'], None)
+            else:
+                self._index[record['name']] = record
+        self._index_pos += complete
+
+    def _append_index(self, record: dict):
+        # 调用方需持有 self._lock 和文件锁
+        with open(os.path.join(self.root, INDEX_LOG), 'ab') as f:
+            f.write((json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8'))
+        self._refresh()
+
+    def _append(self, name: str, size: int, res_type: str, write_payload: Callable):
+        with self._lock, file_lock(self._lock_file):
+            self._refresh()
+            segment = self._latest_segment()
+            writer = open(self._segment_path(segment), 'ab')
+            offset = os.fstat(writer.fileno()).st_size
+            if offset and offset + size > self.segment_max_bytes:
+                writer.close()
+                segment += 1
+                writer = open(self._segment_path(segment), 'ab')
+                offset = 0
+            with writer:
+                write_payload(writer)
+            # 先写数据再写索引，中断时最多丢失最后一条
+            self._append_index({'name': name, 'seg': segment, 'offset': offset, 'size': size,
+                                'res_type': res_type})
+
+    def write(self, name: str, payload: bytes, res_type: str):
+        """
+        追加一条记录，同名旧记录失效（compact 时回收空间）
+        """
+        self._append(name, len(payload), res_type, lambda writer: writer.write(payload))
+
+    def write_file(self, name: str, path: str, res_type: str = 'content', chunk_size: int = 1024 * 1024):
+        """
+        按块把文件内容追加为一条记录，内存占用与文件大小无关
+        """
+        def copy(writer):
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(chunk_size), b''):
+                    writer.write(chunk)
+
+        self._append(name, os.path.getsize(path), res_type, copy)
+
+    def delete(self, name: str):
+        with self._lock, file_lock(self._lock_file):
+            self._refresh()
+            if name not in self._index:
+                return
+            self._append_index({'name': name, 'deleted': True})
+
+    def record(self, name: str) -> Optional[dict]:
+        with self._lock:
+            self._refresh()
+            return self._index.get(name)
+
+    def exists(self, name: str) -> bool:
+        with self._lock:
+            self._refresh()
+            return name in self._index
+
+    def names(self) -> Iterator[str]:
+        with self._lock:
+            self._refresh()
+            return iter(list(self._index))
+
+    def _map(self, segment: int, end: int) -> mmap.mmap:
+        # 调用方需持有 self._lock；end 必须大于 0（空文件无法 mmap）
+        mapped = self._maps.get(segment)
+        if mapped is None or len(mapped) < end:
+            if mapped is not None:
+                self._stale_maps.append(mapped)
+            with open(self._segment_path(segment), 'rb') as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[segment] = mapped
+        return mapped
+
+    def read_view(self, name: str) -> Optional[Tuple[memoryview, str]]:
+        """
+        零拷贝读取，返回 (memoryview, res_type)，不存在时返回 None；memoryview 在 close 前有效
+        """
+        with self._lock:
+            self._refresh()
+            record = self._index.get(name)
+            if record is None:
+                return None
+            if not record['size']:
+                return memoryview(b''), record['res_type']
+            mapped = self._map(record['seg'], record['offset'] + record['size'])
+        return memoryview(mapped)[record['offset']:record['offset'] + record['size']], record['res_type']
+
+    def read(self, name: str) -> Optional[Tuple[bytes, str]]:
+        view = self.read_view(name)
+        if view is None:
+            return None
+        data, res_type = view
+        return bytes(data), res_type
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._refresh()
+            live = sum(record['size'] for record in self._index.values())
+        segments = self._latest_segment()
+        total = sum(os.path.getsize(self._segment_path(segment)) for segment in range(1, segments + 1)
+                    if os.path.exists(self._segment_path(segment)))
+        return {'records': len(self._index), 'live_bytes': live, 'segment_bytes': total, 'segments': segments}
+
+    def compact(self) -> dict:
+        """
+        只保留每个名称的最新记录，重写段文件和索引，回收被覆盖或删除的记录占用的空间
+        压缩会替换段文件，应在没有其他实例读取该目录时执行（如 python -m Core.DumpStore compact）
+        """
+        before = self.stats()
+        tmp_root = f"{self.root}.compact"
+        os.makedirs(tmp_root, exist_ok=True)
+        with self._lock, file_lock(self._lock_file):
+            self._refresh()
+            target = PackedStore(tmp_root, self.segment_max_bytes)
+            for name, record in self._index.items():
+                payload = self._map(record['seg'], record['offset'] + record['size'])[
+                    record['offset']:record['offset'] + record['size']] if record['size'] else b''
+                target.write(name, payload, record['res_type'])
+            target.close()
+            self._close_maps()
+            for name in os.listdir(self.root):
+                if name == INDEX_LOG or name.startswith(SEGMENT_PREFIX):
+                    os.remove(os.path.join(self.root, name))
+            for name in os.listdir(tmp_root):
+                if name == LOCK_FILE:
+                    os.remove(os.path.join(tmp_root, name))
+                else:
+                    os.replace(os.path.join(tmp_root, name), os.path.join(self.root, name))
+            os.rmdir(tmp_root)
+            self._refresh()
+        after = self.stats()
+        logger.info(f"PackedStore {self.root} 压缩完成: {before['segment_bytes']} -> {after['segment_bytes']} 字节")
+        return {'before': before, 'after': after}
+
+    def _close_maps(self):
+        # 调用方需持有 self._lock
+        for mapped in list(self._maps.values()) + self._stale_maps:
+            try:
+                mapped.close()
+            except BufferError:
+                # 仍有 memoryview 引用该映射，交给垃圾回收释放
+                pass
+        self._maps, self._stale_maps = {}, []
+
+    def close(self):
+        with self._lock:
+            self._close_maps()
+            if not self._lock_file.closed:
+                self._lock_file.close()
+
+
+def migrate(date_dir: str, delete: bool = False, segment_max_bytes: int = 256 * 1024 * 1024) -> int:
+    """
+    把 date_dir 下逐个保存的 dump 文件打包到 date_dir/_packed，名称为相对 date_dir 的路径
+    :param delete: 打包成功后删除原文件
+    :return: 迁移的文件数
+    """
+    store = PackedStore(os.path.join(date_dir, PACKED_DIR), segment_max_bytes)
+    count = 0
+    try:
+        for dir_path, dir_names, file_names in os.walk(date_dir):
+            dir_names[:] = [name for name in dir_names if name != PACKED_DIR]
+            for file_name in file_names:
+                path = os.path.join(dir_path, file_name)
+                name = os.path.relpath(path, date_dir).replace(os.sep, '/')
+                with open(path, 'rb') as f:
+                    store.write(name, f.read(), res_type_of(name))
+                if delete:
+                    os.remove(path)
+                count += 1
+    finally:
+        store.close()
+    if delete:
+        # 清理迁移后留下的空目录
+        for dir_path, _, _ in os.walk(date_dir, topdown=False):
+            if dir_path != date_dir and PACKED_DIR not in dir_path and not os.listdir(dir_path):
+                os.rmdir(dir_path)
+    logger.info(f"迁移 {date_dir}: {count} 个文件")
+    return count
+
+
+if __name__ == '__main__':
+    # 用法: python -m Core.DumpStore compact <date_dir>
+    #      python -m Core.DumpStore migrate <date_dir> [--delete]
+    if len(sys.argv) < 3 or sys.argv[1] not in ('compact', 'migrate'):
+        print("usage: python -m Core.DumpStore compact|migrate <date_dir> [--delete]")
+        sys.exit(1)
+    command, target_dir = sys.argv[1], sys.argv[2]
+    if command == 'migrate':
+        migrate(target_dir, delete='--delete' in sys.argv[3:])
+    else:
+        packed = PackedStore(os.path.join(target_dir, PACKED_DIR))
+        try:
+            print(packed.compact())
+        finally:
+            packed.close()
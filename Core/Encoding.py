@@ -0,0 +1,105 @@
+#!usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@author: xyl
+@file:  Encoding.py
+@time: 2026/10/17
+"""
+import re
+import threading
+from typing import Optional, Dict, Tuple
+from urllib.parse import urlsplit
+
+from requests.compat import chardet
+
+_HEADER_CHARSET_RE = re.compile(r'charset\s*=\s*["\']?([\w.:-]+)', re.I)
+_META_CHARSET_RE = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?([\w.:-]+)', re.I)
+
+
+class EncodingDetector:
+    """
+    响应编码推断策略，替代对整个响应体的 apparent_encoding 检测：
+    1. Content-Type 响应头声明了 charset 时直接使用
+    2. 响应体前 sniff_bytes 字节内有 <meta charset> 时使用（每个响应单独检查）
+    3. 使用该 host 之前可靠检测出的编码
+    4. 对前 sniff_bytes 字节做字符集检测，前缀是纯 ASCII 或置信度不足时检测整个响应体；
+       ascii 按 utf-8 处理，只有置信度足够的非 ascii 结果才按 host 缓存
+    """
+
+    def __init__(self, sniff_bytes: int = 64 * 1024, default: str = 'utf-8', min_confidence: float = 0.8):
+        """
+        :param sniff_bytes: 字符集检测最多读取的字节数
+        :param default: 无法检测时使用的编码
+        :param min_confidence: 检测结果的置信度不低于该值时才按 host 缓存
+        """
+        self.sniff_bytes = sniff_bytes
+        self.default = default
+        self.min_confidence = min_confidence
+        self._host_encodings: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.header_hits = 0
+        self.meta_hits = 0
+        self.cache_hits = 0
+        self.sniffed = 0
+
+    @staticmethod
+    def header_charset(content_type: Optional[str]) -> Optional[str]:
+        if not content_type:
+            return None
+        match = _HEADER_CHARSET_RE.search(content_type)
+        return match.group(1) if match else None
+
+    def meta_charset(self, content: bytes) -> Optional[str]:
+        match = _META_CHARSET_RE.search(content[:self.sniff_bytes])
+        return match.group(1).decode('ascii', errors='ignore') if match else None
+
+    def detect(self, content: bytes) -> Tuple[str, bool]:
+        """
+        字符集检测，返回 (编码, 是否可靠)；纯 ASCII 内容返回 utf-8 且不可靠（后续页面可能含非 ASCII 字符）
+        """
+        result = chardet.detect(content[:self.sniff_bytes])
+        encoding, confidence = result.get('encoding'), result.get('confidence') or 0
+        if (not encoding or encoding.lower() == 'ascii' or confidence < self.min_confidence) \
+                and len(content) > self.sniff_bytes:
+            # 前缀只有 ASCII 标记或无法判断时检测整个响应体，与 apparent_encoding 一致
+            result = chardet.detect(content)
+            encoding, confidence = result.get('encoding'), result.get('confidence') or 0
+        if not encoding or encoding.lower() == 'ascii':
+            return self.default, False
+        return encoding, confidence >= self.min_confidence
+
+    def sniff(self, content: bytes) -> str:
+        """
+        优先使用 HTML 中声明的 meta charset，否则做字符集检测
+        """
+        return self.meta_charset(content) or self.detect(content)[0]
+
+    def resolve(self, response) -> str:
+        """
+        推断 requests.Response / httpx.Response 的编码
+        """
+        charset = self.header_charset(response.headers.get('Content-Type'))
+        if charset:
+            self.header_hits += 1
+            return charset
+        content = response.content
+        charset = self.meta_charset(content)
+        if charset:
+            self.meta_hits += 1
+            return charset
+        host = urlsplit(str(response.url)).netloc
+        with self._lock:
+            encoding = self._host_encodings.get(host)
+        if encoding:
+            self.cache_hits += 1
+            return encoding
+        encoding, reliable = self.detect(content)
+        self.sniffed += 1
+        if reliable:
+            with self._lock:
+                self._host_encodings[host] = encoding
+        return encoding
+
+    def stats(self) -> dict:
+        return {'header_hits': self.header_hits, 'meta_hits': self.meta_hits, 'cache_hits': self.cache_hits,
+                'sniffed': self.sniffed}
@@ -0,0 +1,224 @@
+#!usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@author: xyl
+@file:  HttpSession.py
+@time: 2026/10/17
+"""
+import itertools
+import random
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+import httpx
+import requests
+import tls_client
+from loguru import logger
+from requests.adapters import HTTPAdapter
+from requests.utils import select_proxy
+
+
+class SessionPool:
+    """
+    任务级共享的 requests 会话
+    底层 urllib3 为每个 host 维护一个 keep-alive 连接池（pool_maxsize 为单 host 上限），
+    多个工作线程共享连接与 Cookie（CookieJar 自带锁），任务结束时统一关闭。
+    """
+
+    def __init__(self, pool_connections: int = 10, pool_maxsize: int = 32, pool_block: bool = True):
+        """
+        :param pool_connections: 缓存连接池的 host 数量
+        :param pool_maxsize: 每个 host 连接池的最大连接数
+        :param pool_block: 连接数达到上限时是否等待空闲连接（否则临时新建连接且用完即弃）
+        """
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self._lock = threading.Lock()
+        self._session = requests.Session()
+        # 重试由 JobBase 的重试策略负责，这里不让 urllib3 自动重试
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                              pool_block=pool_block, max_retries=0)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+        self._closed = False
+
+    @property
+    def cookies(self):
+        return self._session.cookies
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        if self._closed:
+            raise RuntimeError("SessionPool 已关闭")
+        return self._session.request(method, url, **kwargs)
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._session.close()
+        logger.debug("SessionPool 已关闭")
+
+
+class Http2Pool:
+    """
+    任务级共享的 HTTP/2 客户端（httpx）
+    同一 host 的并发请求复用一条连接多路复用，不再受“一个连接同时只能有一个请求”的限制；
+    httpx 的代理是客户端级别的，按代理地址分别维护客户端，线程安全，任务结束时统一关闭。
+    """
+
+    def __init__(self, max_connections: int = 10, prior_knowledge: bool = False):
+        """
+        :param max_connections: 最大连接数（所有 host 合计）
+        :param prior_knowledge: 明文 http:// 也直接使用 HTTP/2（h2c），否则只有 https 通过 ALPN 协商 HTTP/2
+        """
+        self.max_connections = max_connections
+        self.prior_knowledge = prior_knowledge
+        self._lock = threading.Lock()
+        self._clients = {}
+        self._closed = False
+
+    def client(self, proxy: Optional[str] = None) -> httpx.Client:
+        """
+        :param proxy: 代理地址，None 表示直连
+        """
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Http2Pool 已关闭")
+            client = self._clients.get(proxy)
+            if client is None:
+                limits = httpx.Limits(max_connections=self.max_connections,
+                                      max_keepalive_connections=self.max_connections)
+                client = httpx.Client(http2=True, http1=not self.prior_knowledge, proxy=proxy, limits=limits)
+                self._clients[proxy] = client
+        return client
+
+    def request(self, method: str, url: str, proxies: Optional[Dict[str, str]] = None,
+                cookies: Optional[Dict[str, str]] = None, headers: Optional[Dict[str, str]] = None,
+                **kwargs) -> httpx.Response:
+        if cookies:
+            # httpx 已不推荐按请求传 cookies，直接拼到请求头
+            headers = dict(headers or {})
+            headers['Cookie'] = '; '.join(f"{k}={v}" for k, v in cookies.items())
+        # 与 requests 一致，按请求 URL 的 scheme（及 host）从 proxies 中选择代理
+        proxy = select_proxy(url, proxies) if proxies else None
+        return self.client(proxy).request(method, url, headers=headers, **kwargs)
+
+    def close(self):
+        with self._lock:
+            clients, self._clients = list(self._clients.values()), {}
+            self._closed = True
+        for client in clients:
+            client.close()
+        logger.debug("Http2Pool 已关闭")
+
+
+class _TlsSlot:
+    def __init__(self, session, ja3_string: str):
+        self.session = session
+        self.ja3_string = ja3_string
+        self.uses = 0  # 累计使用次数
+        self.in_use = 0  # 当前并发使用数
+        self.retired = False
+
+
+class TlsSessionPool:
+    """
+    tls_client 会话池
+    维护 size 个会话，每个会话有各自固定的随机 JA3 指纹并复用连接；
+    按最少并发（least_load）或轮询（round_robin）分配，会话出错或使用达到 max_uses 次后退役并换新指纹。
+    """
+    JA3_TEMPLATE = "771,4865-4866-4867-49195-XXXXX-49196-49200-YYYYY-52392-49171-49172-156-157-47-53,0-23-ZZZZZ-10-11-35-16-5-13-18-51-45-43-27-17513,29-23-24,0"
+
+    def __init__(self, size: int = 4, max_uses: int = 500, strategy: str = 'least_load'):
+        """
+        :param size: 会话数量
+        :param max_uses: 单个会话最多使用次数，达到后退役
+        :param strategy: 分配策略 least_load / round_robin
+        """
+        if size <= 0:
+            raise ValueError("size 必须大于0")
+        if strategy not in ('least_load', 'round_robin'):
+            raise ValueError(f"不支持的 strategy: {strategy}")
+        self.size = size
+        self.max_uses = max_uses
+        self.strategy = strategy
+        self._lock = threading.Lock()
+        self._round_robin = itertools.count()
+        self._slots = [self._new_slot() for _ in range(size)]
+        self._closed = False
+        self.retired_count = 0
+
+    @classmethod
+    def random_ja3(cls) -> str:
+        return (cls.JA3_TEMPLATE
+                .replace('XXXXX', str(random.randint(49234, 65231)))
+                .replace('YYYYY', str(random.randint(49234, 65231)))
+                .replace('ZZZZZ', str(random.randint(49234, 65231))))
+
+    def _new_slot(self) -> _TlsSlot:
+        ja3_string = self.random_ja3()
+        return _TlsSlot(tls_client.Session(ja3_string=ja3_string, random_tls_extension_order=True), ja3_string)
+
+    def _pick(self) -> _TlsSlot:
+        if self.strategy == 'round_robin':
+            return self._slots[next(self._round_robin) % len(self._slots)]
+        return min(self._slots, key=lambda slot: (slot.in_use, slot.uses))
+
+    def _retire(self, slot: _TlsSlot):
+        # 调用方需持有 self._lock
+        if slot.retired:
+            return
+        slot.retired = True
+        self.retired_count += 1
+        # 会话池已关闭或该会话已被替换时不再补充新会话
+        if self._closed or slot not in self._slots:
+            return
+        self._slots[self._slots.index(slot)] = self._new_slot()
+
+    @contextmanager
+    def session(self):
+        """
+        借出一个会话，with 块内抛出异常时该会话退役
+        """
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("TlsSessionPool 已关闭")
+            slot = self._pick()
+            slot.in_use += 1
+            slot.uses += 1
+            if slot.uses >= self.max_uses:
+                self._retire(slot)
+        failed = False
+        try:
+            yield slot.session
+        except Exception:
+            failed = True
+            raise
+        finally:
+            with self._lock:
+                slot.in_use -= 1
+                if failed:
+                    self._retire(slot)
+                close_session = slot.retired and slot.in_use == 0
+            if close_session:
+                self._close_session(slot.session)
+
+    def stats(self) -> list:
+        with self._lock:
+            return [{'ja3': slot.ja3_string, 'uses': slot.uses, 'in_use': slot.in_use} for slot in self._slots]
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            slots, self._slots = self._slots, []
+        for slot in slots:
+            self._close_session(slot.session)
+
+    @staticmethod
+    def _close_session(session):
+        try:
+            session.close()
+        except Exception as e:
+            logger.warning(f"关闭 tls_client 会话失败: {e}")
@@ -0,0 +1,164 @@
+#!usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@author: xyl
+@file:  Index.py
+@time: 2026/10/17
+"""
+# 声明式索引管理：框架和任务注册索引声明，启动时幂等创建，并可报告缺失/未使用/冗余索引
+# 用法: python -m Core.Index [ensure|report]
+import sys
+import threading
+from typing import List, Dict, Tuple
+
+from loguru import logger
+from pymongo import ASCENDING, DESCENDING
+
+from Core.Config import DB_NAME
+
+
+class IndexSpec:
+    def __init__(self, db_name: str, collection_name: str, keys: List[Tuple[str, int]], **options):
+        """
+        单个索引声明
+        :param db_name: 数据库名称
+        :param collection_name: 集合名称
+        :param keys: 索引键列表，如 [('JobId', ASCENDING)]
+        :param options: create_index 的其他参数，如 unique=True
+        """
+        self.db_name = db_name
+        self.collection_name = collection_name
+        self.keys = [(key, direction) for key, direction in keys]
+        self.options = options
+
+    @property
+    def name(self) -> str:
+        return self.options.get('name') or '_'.join(f"{key}_{direction}" for key, direction in self.keys)
+
+    def __repr__(self):
+        return f"{self.db_name}.{self.collection_name}:{self.name}"
+
+
+class IndexRegistry:
+    """
+    进程级索引声明注册表
+    """
+    _specs: Dict[tuple, IndexSpec] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def register(cls, db_name: str, collection_name: str, keys: List[Tuple[str, int]], **options) -> IndexSpec:
+        """
+        注册索引声明，相同的 (db, collection, keys) 只保留一份
+        """
+        spec = IndexSpec(db_name, collection_name, keys, **options)
+        with cls._lock:
+            cls._specs.setdefault((db_name, collection_name, tuple(spec.keys)), spec)
+        return spec
+
+    @classmethod
+    def specs(cls) -> List[IndexSpec]:
+        with cls._lock:
+            return list(cls._specs.values())
+
+    @classmethod
+    def collections(cls) -> Dict[Tuple[str, str], List[IndexSpec]]:
+        """
+        按 (db, collection) 分组的索引声明
+        """
+        grouped = {}
+        for spec in cls.specs():
+            grouped.setdefault((spec.db_name, spec.collection_name), []).append(spec)
+        return grouped
+
+
+def ensure_indexes(client) -> List[str]:
+    """
+    幂等地创建所有已注册的索引，已存在的索引不会重复创建
+    :param client: MongoClient
+    :return: 本次确保的索引列表
+    """
+    ensured = []
+    for (db_name, collection_name), specs in IndexRegistry.collections().items():
+        collection = client[db_name][collection_name]
+        try:
+            existing_keys = {tuple(info['key']) for info in collection.index_information().values()}
+        except Exception as e:
+            logger.exception(f"读取索引失败 {db_name}:{collection_name}: {e}")
+            continue
+        for spec in specs:
+            if tuple(spec.keys) in existing_keys:
+                continue
+            try:
+                collection.create_index(spec.keys, name=spec.name,
+                                        **{k: v for k, v in spec.options.items() if k != 'name'})
+                ensured.append(repr(spec))
+                logger.info(f"已创建索引 {spec!r}")
+            except Exception as e:
+                logger.exception(f"创建索引失败 {spec!r}: {e}")
+    return ensured
+
+
+def index_report(client) -> Dict[str, list]:
+    """
+    报告已注册集合的索引情况
+    - missing: 已声明但不存在的索引
+    - unused: 自服务器启动以来未被使用过的索引（$indexStats）
+    - redundant: 键是另一个索引键前缀的索引
+    :param client: MongoClient
+    """
+    report = {'missing': [], 'unused': [], 'redundant': []}
+    for (db_name, collection_name), specs in IndexRegistry.collections().items():
+        collection = client[db_name][collection_name]
+        full_name = f"{db_name}.{collection_name}"
+        try:
+            indexes = collection.index_information()
+        except Exception as e:
+            logger.exception(f"读取索引失败 {full_name}: {e}")
+            continue
+        existing_keys = {tuple(info['key']) for info in indexes.values()}
+        report['missing'].extend(repr(spec) for spec in specs if tuple(spec.keys) not in existing_keys)
+
+        try:
+            for stat in collection.aggregate([{'$indexStats': {}}]):
+                if stat['name'] != '_id_' and stat['accesses']['ops'] == 0:
+                    report['unused'].append(f"{full_name}:{stat['name']}")
+        except Exception as e:
+            logger.warning(f"无法读取索引使用统计 {full_name}: {e}")
+
+        for name, info in indexes.items():
+            if name == '_id_' or info.get('unique') or info.get('partialFilterExpression'):
+                continue
+            keys = list(info['key'])
+            for other_name, other_info in indexes.items():
+                other_keys = list(other_info['key'])
+                if other_name != name and len(other_keys) > len(keys) and other_keys[:len(keys)] == keys:
+                    report['redundant'].append(f"{full_name}:{name} (被 {other_name} 覆盖)")
+                    break
+    return report
+
+
+# 框架集合的索引声明
+IndexRegistry.register(DB_NAME, 'History', [('RunId', DESCENDING)])
+IndexRegistry.register(DB_NAME, 'History', [('JobId', ASCENDING), ('StartTime', DESCENDING)])
+IndexRegistry.register(DB_NAME, 'History', [('StartTime', DESCENDING)])
+IndexRegistry.register(DB_NAME, 'History', [('Status', ASCENDING), ('StartTime', DESCENDING)])
+IndexRegistry.register(DB_NAME, 'Job', [('JobId', ASCENDING)])
+IndexRegistry.register(DB_NAME, 'Job', [('Disabled', ASCENDING)])
+
+
+if __name__ == '__main__':
+    # 以 -m 运行时本模块是 __main__，注册信息在已导入的 Core.Index 中
+    from Core import db
+    from Core.Index import ensure_indexes as _ensure_indexes, index_report as _index_report
+
+    command = sys.argv[1] if len(sys.argv) > 1 else 'report'
+    if command == 'ensure':
+        print(f"ensured: {_ensure_indexes(db.client)}")
+    elif command == 'report':
+        for category, items in _index_report(db.client).items():
+            print(f"{category} ({len(items)}):")
+            for item in items:
+                print(f"  {item}")
+    else:
+        print("用法: python -m Core.Index [ensure|report]")
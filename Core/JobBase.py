@@ -7,27 +7,38 @@
 """
 import datetime
 import hashlib
+import inspect
 import json
 import logging
 import os
-import random
 import sys
-import time
-from contextlib import ContextDecorator
+import threading
+from contextlib import ContextDecorator, nullcontext
 from functools import wraps
-from typing import Union, Tuple, Callable, Optional, Dict, List
+from typing import Union, Tuple, Callable, Optional, Dict, List, Iterable, Iterator, AsyncIterator
 
-import requests
-import tls_client
+import httpx
 from loguru import logger
 from pandas import DataFrame
-from requests import RequestException, ReadTimeout, ConnectTimeout
+from requests import RequestException, ReadTimeout, ConnectTimeout, ConnectionError as RequestsConnectionError
 from requests.models import HTTPError
 
+from Core.AsyncFetcher import AsyncFetcher, FetchResult
 from Core.ConcurrentExecutor import ConcurrentExecutor
-from Core.Config import content_type_ext
+from Core.Download import ResumableDownload, StreamResult, file_sha256
+from Core.DumpCodec import DumpCodec, body_view, decode_body, decode_dump, encode_dump, loads_json
+from Core.DumpStore import PACKED_DIR, PackedStore, res_type_of
+from Core.Encoding import EncodingDetector
 from Core.EntityBase import EntityBase
+from Core.HttpSession import Http2Pool, SessionPool, TlsSessionPool
+from Core.Index import IndexRegistry
+from Core.MemoryCache import ByteLRUCache
 from Core.MongoDB import MongoDB
+from Core.ProxyPool import ProxyLease, ProxyPool
+from Core.RateLimit import RateLimiter
+from Core.ResponseCache import CacheCounters, ResponseCache, cache_key, response_validators
+from Core.SingleFlight import SingleFlight
+from Core.Retry import RetryPolicy, request_url
 
 
 # 自定义exception
@@ -45,34 +56,34 @@ def retry(
         backoff: Union[int, float] = 2,  # 延迟倍数
         exceptions: Tuple[Exception] = capture_exceptions,  # 捕获的异常类型
 ):
+    """
+    兼容原接口的重试装饰器，实际由 RetryPolicy 执行（full jitter 退避、按 host 熔断、重试预算）
+    被装饰的方法所属实例有 retry_policy 时使用该策略（任务级共享熔断状态和预算），否则使用装饰器参数构造的策略；
+    调用时可传 retry_count 覆盖重试次数，支持协程函数
+    """
+    default_policy = RetryPolicy(max_retries=default_count, base_delay=delay, max_delay=max_delay,
+                                 backoff=backoff, exceptions=exceptions)
+
     def decorator(func: Callable):
+        def resolve(args, kwargs):
+            retries = kwargs.pop('retry_count', default_count)
+            policy = getattr(args[0], 'retry_policy', None) if args else None
+            if not isinstance(policy, RetryPolicy):
+                policy = default_policy
+            return policy, retries, request_url(func, args, kwargs)
+
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                policy, retries, url = resolve(args, kwargs)
+                return await policy.acall(func, args, kwargs, url=url, retries=retries)
+
+            return async_wrapper
+
         @wraps(func)
         def wrapper(*args, **kwargs):
-            retries = kwargs.pop('retry_count', default_count)
-            request_url = args[1] if len(args) < 2 or args[1] is not None else (
-                kwargs.get('url') if 'url' in kwargs else None)
-            func_name = func.__name__
-            for attempt in range(retries + 1):
-                try:
-                    response = func(*args, **kwargs)
-                    logger.debug(f"[Success] {func_name} Attempt {attempt + 1} success, url: {request_url}")
-                    return response
-                except exceptions as e:
-                    final_error = e
-                    if attempt < retries:
-                        sleep_time = min(delay * (backoff ** attempt), max_delay)
-                        logger.error(
-                            f"[Failure] {func_name} Attempt {attempt + 1} failed: {str(e)}, url: {request_url}, retrying in {sleep_time}s...")
-                        time.sleep(sleep_time)
-                    else:
-                        logger.error(
-                            f"[FINAL FAILURE] {func_name} after {retries} retries, failed: {str(final_error)}, url: {request_url} ")
-                        raise final_error
-                except Exception as unexpected_error:
-                    logger.critical(
-                        f"[UNEXPECTED ERROR] Attempt {attempt} failed: {str(unexpected_error)}, url: {request_url} ")
-                    raise unexpected_error
-            return None
+            policy, retries, url = resolve(args, kwargs)
+            return policy.call(func, args, kwargs, url=url, retries=retries)
 
         return wrapper
 
@@ -173,9 +184,45 @@ class JobBaseMeta(type):
         return super().__new__(cls, name, bases, attrs)
 
 
-class JobBase(metaclass=JobBaseMeta, ConcurrentExecutor):
+class JobBase(ConcurrentExecutor, metaclass=JobBaseMeta):
     """任务基类"""
     _registry = {}
+    # 任务集合的索引声明 {集合名: [索引键列表, ...]}，如 {'pages': [[('id', 1)]]}，启动时自动创建
+    indexes: Dict[str, List[List[Tuple[str, int]]]] = {}
+    # HTTP 连接池配置：缓存连接池的 host 数量、每个 host 的最大 keep-alive 连接数
+    http_pool_connections = 10
+    http_pool_maxsize = 32
+    # tls_client 会话池配置：会话数量、单个会话最多使用次数
+    tls_pool_size = 4
+    tls_session_max_uses = 500
+    # download_page 默认使用的传输方式：requests（HTTP/1.1）或 h2（HTTP/2 多路复用，同一 host 的并发请求共用连接）
+    http_transport = 'requests'
+    # HTTP/2 客户端配置：最大连接数、明文 http:// 是否直接使用 h2c
+    http2_max_connections = 10
+    http2_prior_knowledge = False
+    # 代理池：代理地址列表（为空时不使用）、连续失败多少次隔离、首次隔离秒数；未显式传入 proxies 的请求从池中选择，
+    # 评分保存在 folder/proxy_scores.json，下次运行时继续使用
+    proxy_list: List[str] = []
+    proxy_failure_threshold = 3
+    proxy_quarantine_seconds = 60
+    # 按 host 限速与自适应并发：每个 host 每秒最多请求数（None 不限速）、单 host 最大并发数
+    rate_limit: Optional[float] = None
+    max_host_concurrency = 32
+    # 重试策略：单次运行合计最大重试次数（None 不限）、同一 host 连续失败多少次熔断、熔断多少秒后半开探测
+    retry_budget: Optional[int] = None
+    circuit_failure_threshold = 5
+    circuit_recovery_timeout = 30
+    # 自动响应缓存（按请求内容寻址，跨日期复用）：是否默认开启（可按调用用 cache 参数覆盖）、有效期（秒）、总大小上限
+    cache_responses = False
+    response_cache_ttl: Optional[float] = 86400
+    response_cache_max_bytes = 1 << 30
+    # dump 存储方式：files 每个响应一个文件；packed 追加写入 folder/date/_packed 下的段文件（读取时兼容已有的单个文件）
+    dump_store = 'files'
+    dump_segment_max_bytes = 256 * 1024 * 1024
+    # dump 编码：None 为旧格式（json 缩进、不压缩）；如 DumpCodec('zstd') 使用 orjson + 压缩，读取时按文件头自动识别
+    dump_codec: Optional[DumpCodec] = None
+    # get_dump 的进程内缓存容量（字节，按 LRU 淘汰），0 表示不缓存
+    dump_memory_cache_bytes = 64 * 1024 * 1024
 
     def __init_subclass__(cls, **kwargs):
         """自动注册子类，支持多个 job_id"""
@@ -192,6 +239,11 @@ class JobBase(metaclass=JobBaseMeta, ConcurrentExecutor):
                 if job_id in JobBase._registry:
                     raise ValueError(f"JobId {job_id} already registered by {JobBase._registry[job_id].__name__}")
                 JobBase._registry[job_id] = cls
+            # 注册任务日志集合及自定义集合的索引，数据库名与 JobBase.__init__ 中一致
+            IndexRegistry.register(cls.__name__, 'log', [('job_id', 1), ('run_id', 1), ('level', 1)])
+            for collection_name, index_keys_list in cls.indexes.items():
+                for index_keys in index_keys_list:
+                    IndexRegistry.register(cls.__name__, collection_name, index_keys)
 
     def __init__(self, *args, **kwargs):
         self.job_id = kwargs.get('job_id')
@@ -205,6 +257,147 @@ class JobBase(metaclass=JobBaseMeta, ConcurrentExecutor):
         self.log_handler = MongoDBHandler(db=self.db, db_name=self.job_name, job_id=self.job_id, run_id=self.run_id)
         self.logger = self.log_handler.logger
         self.log = self.log_handler.logger
+        self._session_pool = None
+        self._tls_session_pool = None
+        self._http2_pool = None
+        self._proxy_pool = None
+        self._response_cache = None
+        # 响应缓存按目录在进程内共享，本任务实例的命中统计单独计数
+        self.response_cache_counters = CacheCounters()
+        self._packed_stores: Dict[str, PackedStore] = {}
+        # 本次运行内 get_dump 结果的内存缓存，dump 写入同名文件时失效
+        self.dump_cache = ByteLRUCache(self.dump_memory_cache_bytes)
+        # 多个线程同时请求同一 url + dump 时只实际抓取一次
+        self.single_flight = SingleFlight()
+        self._session_lock = threading.Lock()
+        self.encoding_detector = EncodingDetector()
+        # download_page、download_page_tls_client 和 fetch_many 共用
+        self.rate_limiter = RateLimiter(rate=self.rate_limit, max_concurrency=self.max_host_concurrency)
+        # retry 装饰器和 fetch_many 共用，熔断状态与重试预算在本次运行内共享
+        self.retry_policy = RetryPolicy(exceptions=capture_exceptions,
+                                        budget=self.retry_budget,
+                                        failure_threshold=self.circuit_failure_threshold,
+                                        recovery_timeout=self.circuit_recovery_timeout)
+
+    @property
+    def session_pool(self) -> SessionPool:
+        """
+        任务实例共享的 HTTP 会话（keep-alive 连接池 + Cookie 持久化），首次使用时创建
+        """
+        if self._session_pool is None:
+            with self._session_lock:
+                if self._session_pool is None:
+                    self._session_pool = SessionPool(pool_connections=self.http_pool_connections,
+                                                     pool_maxsize=self.http_pool_maxsize)
+        return self._session_pool
+
+    @property
+    def tls_session_pool(self) -> TlsSessionPool:
+        """
+        任务实例共享的 tls_client 会话池，首次使用时创建
+        """
+        if self._tls_session_pool is None:
+            with self._session_lock:
+                if self._tls_session_pool is None:
+                    self._tls_session_pool = TlsSessionPool(size=self.tls_pool_size,
+                                                            max_uses=self.tls_session_max_uses)
+        return self._tls_session_pool
+
+    @property
+    def http2_pool(self) -> Http2Pool:
+        """
+        任务实例共享的 HTTP/2 客户端，首次使用时创建
+        """
+        if self._http2_pool is None:
+            with self._session_lock:
+                if self._http2_pool is None:
+                    self._http2_pool = Http2Pool(max_connections=self.http2_max_connections,
+                                                 prior_knowledge=self.http2_prior_knowledge)
+        return self._http2_pool
+
+    @property
+    def proxy_pool(self) -> Optional[ProxyPool]:
+        """
+        任务的代理池，proxy_list 为空时为 None，首次使用时加载历史评分
+        """
+        if self._proxy_pool is None and self.proxy_list:
+            with self._session_lock:
+                if self._proxy_pool is None:
+                    # 同一任务的多个实例共享一个代理池，避免评分文件互相覆盖
+                    self._proxy_pool = ProxyPool.acquire(os.path.join(self.folder, 'proxy_scores.json'),
+                                                         self.proxy_list,
+                                                         failure_threshold=self.proxy_failure_threshold,
+                                                         quarantine_seconds=self.proxy_quarantine_seconds)
+        return self._proxy_pool
+
+    def _proxy_lease(self, proxies: Optional[Dict[str, str]] = None, proxy_session: Optional[str] = None):
+        # 调用方显式传入 proxies 时直接使用，否则从代理池借用（没有代理池时不使用代理）
+        if proxies is not None or self.proxy_pool is None:
+            return nullcontext(ProxyLease(proxies=proxies))
+        return self.proxy_pool.lease(proxy_session)
+
+    @property
+    def response_cache(self) -> ResponseCache:
+        """
+        任务的响应缓存，位于 folder/cache，不按日期划分，首次使用时加载索引
+        """
+        if self._response_cache is None:
+            with self._session_lock:
+                if self._response_cache is None:
+                    # 同一任务的多个实例共享一个缓存，避免索引互相覆盖
+                    self._response_cache = ResponseCache.acquire(os.path.join(self.folder, 'cache'),
+                                                                 max_bytes=self.response_cache_max_bytes,
+                                                                 ttl=self.response_cache_ttl)
+        return self._response_cache
+
+    def stats(self) -> dict:
+        """
+        本次运行的统计，任务结束时写入 History.Stats
+        """
+        stats = {'retry': dict(self.retry_policy.metrics), 'dump_cache': self.dump_cache.stats(),
+                 'single_flight': self.single_flight.stats()}
+        if self._response_cache is not None:
+            stats['response_cache'] = self._response_cache.stats(self.response_cache_counters)
+        if self._proxy_pool is not None:
+            stats['proxy_pool'] = self._proxy_pool.stats()
+        return stats
+
+    def close(self):
+        """
+        任务结束时释放资源：写入缓冲的数据、关闭 HTTP 会话、保存响应缓存索引
+        """
+        self.db.close_writers()
+        with self._session_lock:
+            session_pool, self._session_pool = self._session_pool, None
+            tls_session_pool, self._tls_session_pool = self._tls_session_pool, None
+            http2_pool, self._http2_pool = self._http2_pool, None
+        for pool in (session_pool, tls_session_pool, http2_pool):
+            if pool is not None:
+                pool.close()
+        if self._response_cache is not None:
+            # 保留引用，close 之后 stats() 仍可读取命中统计
+            self._response_cache.release()
+        if self._proxy_pool is not None:
+            self._proxy_pool.release()
+        with self._session_lock:
+            packed_stores, self._packed_stores = list(self._packed_stores.values()), {}
+        for store in packed_stores:
+            store.close()
+
+    def packed_store(self, date: Optional[str] = None) -> PackedStore:
+        """
+        指定日期（默认当天）的打包 dump 存储，首次使用时加载索引
+        """
+        target_date = date or self.date
+        store = self._packed_stores.get(target_date)
+        if store is None:
+            with self._session_lock:
+                store = self._packed_stores.get(target_date)
+                if store is None:
+                    store = PackedStore(os.path.join(self.folder, target_date, PACKED_DIR),
+                                        segment_max_bytes=self.dump_segment_max_bytes)
+                    self._packed_stores[target_date] = store
+        return store
 
     def on_run(self):
         """任务执行入口，子类重写此方法"""
@@ -267,6 +460,66 @@ class JobBase(metaclass=JobBaseMeta, ConcurrentExecutor):
         except Exception as e:
             self.log.warning(f"保存缓存失败: {e}")  # 不 raise，只记录
 
+    def _response_cache_key(self, cache: Optional[bool], method, url, params, data, json_data,
+                            res_type) -> Optional[str]:
+        # cache 为 None 时使用任务级配置 cache_responses；不使用响应缓存时返回 None
+        use_cache = self.cache_responses if cache is None else cache
+        if not use_cache:
+            return None
+        return cache_key(method, url, params, data, json_data, res_type)
+
+    @staticmethod
+    def _flight_key(transport: str, **request_args) -> str:
+        # 影响结果的所有参数（含请求头、Cookie、代理、编码、校验条件）都参与合并键，只有完全相同的请求才共享结果
+        payload = json.dumps([transport, request_args], sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _read_response_cache(self, key: Optional[str], read_dump: bool = True, dump_file_name=None,
+                             res_type='text'):
+        if key is None or not read_dump:
+            return None
+        res = self.response_cache.get(key, counters=self.response_cache_counters)
+        if res is not None and dump_file_name:
+            # 命中响应缓存时仍写入当天的 dump，保持 dump_file_name 的语义
+            self._dump_response(res, dump_file_name, res_type)
+        return res
+
+    def _write_response_cache(self, key: Optional[str], res, res_type, cache_ttl: Optional[float] = None,
+                              response=None):
+        if key is None or res is None:
+            return
+        # 保存 ETag/Last-Modified，条目过期后用于条件请求
+        meta = response_validators(response.headers) if response is not None else None
+        try:
+            self.response_cache.put(key, res, res_type, ttl=cache_ttl, meta=meta, counters=self.response_cache_counters)
+        except Exception as e:
+            self.log.warning(f"写入响应缓存失败: {e}")
+
+    def _revalidation_headers(self, key: Optional[str], read_dump: bool, method: str,
+                              headers: Optional[Dict[str, str]]) -> Optional[Dict[str, str]]:
+        # 响应缓存中有过期条目时附加 If-None-Match/If-Modified-Since，调用方显式传入的请求头优先
+        if key is None or not read_dump or method.upper() != 'GET':
+            return headers
+        conditional = self.response_cache.conditional_headers(key)
+        if not conditional:
+            return headers
+        conditional.update(headers or {})
+        return conditional
+
+    def _read_revalidated(self, key: Optional[str], url, response, dump_file_name=None, res_type='text',
+                          cache_ttl: Optional[float] = None):
+        """服务端返回 304 时使用响应缓存中的本地副本并刷新有效期，非 304 返回 None"""
+        if key is None or response.status_code != 304:
+            return None
+        res = self.response_cache.revalidate(key, ttl=cache_ttl, meta=response_validators(response.headers),
+                                             counters=self.response_cache_counters)
+        if res is None:
+            # 条目在请求期间被淘汰，重试时不再带条件请求头
+            raise JobException(f"{url} 返回 304 但响应缓存条目已失效")
+        if dump_file_name:
+            self._dump_response(res, dump_file_name, res_type)
+        return res
+
     def _requests(self,
                   url: str,
                   method: str = 'GET',
@@ -280,20 +533,29 @@ class JobBase(metaclass=JobBaseMeta, ConcurrentExecutor):
                   allow_redirects: bool = True,
                   raise_for_status: bool = True,
                   proxies: Optional[Dict[str, str]] = None,
+                  res_type: str = 'text',
+                  proxy_session: Optional[str] = None,
                   ):
         try:
-            response = requests.request(
-                method,
-                url,
-                params=params,
-                data=data,
-                json=json_data,
-                headers=headers,
-                cookies=cookies,
-                timeout=timeout,
-                allow_redirects=allow_redirects,
-                proxies=proxies
-            )
+            with self.rate_limiter.acquire(url), self._proxy_lease(proxies, proxy_session) as lease:
+                try:
+                    response = self.session_pool.request(
+                        method,
+                        url,
+                        params=params,
+                        data=data,
+                        json=json_data,
+                        headers=headers,
+                        cookies=cookies,
+                        timeout=timeout,
+                        allow_redirects=allow_redirects,
+                        proxies=lease.proxies
+                    )
+                except (ReadTimeout, ConnectTimeout, RequestsConnectionError):
+                    self.rate_limiter.observe(url, error=True)
+                    raise
+                lease.observe(response.status_code)
+                self.rate_limiter.observe(url, response.status_code, response.headers.get('Retry-After'))
             # 触发 HTTP 状态码异常检查
             if raise_for_status:
                 response.raise_for_status()
@@ -301,13 +563,64 @@ class JobBase(metaclass=JobBaseMeta, ConcurrentExecutor):
             # 手动覆盖响应编码（优先级高于响应头）
             if encoding is not None:
                 response.encoding = encoding
-            else:
-                response.encoding = response.apparent_encoding
+            elif res_type == 'text':
+                # json/content 不需要文本编码；text 优先信任响应头，否则只检测前缀并按 host 缓存
+                response.encoding = self.encoding_detector.resolve(response)
         except RequestException as e:
             self.log.error(f"request failed: {e}")  # 可选日志记录
             raise JobException(e)  # 触发 retry 装饰器重试
         return response
 
+    def _http2(self,
+               url: str,
+               method: str = 'GET',
+               params: Optional[Dict] = None,
+               data: Optional[Dict] = None,
+               json_data: Optional[Dict] = None,
+               headers: Optional[Dict[str, str]] = None,
+               cookies: Optional[Dict[str, str]] = None,
+               timeout: Union[int, float] = 15,
+               encoding: Optional[str] = None,
+               allow_redirects: bool = True,
+               raise_for_status: bool = True,
+               proxies: Optional[Dict[str, str]] = None,
+               res_type: str = 'text',
+               proxy_session: Optional[str] = None,
+               ):
+        # 参数与返回值同 _requests，底层使用 HTTP/2 多路复用
+        try:
+            with self.rate_limiter.acquire(url), self._proxy_lease(proxies, proxy_session) as lease:
+                try:
+                    response = self.http2_pool.request(
+                        method,
+                        url,
+                        params=params,
+                        data=data,
+                        json=json_data,
+                        headers=headers,
+                        cookies=cookies,
+                        timeout=timeout,
+                        follow_redirects=allow_redirects,
+                        proxies=lease.proxies
+                    )
+                except httpx.TransportError:
+                    self.rate_limiter.observe(url, error=True)
+                    raise
+                lease.observe(response.status_code)
+                self.rate_limiter.observe(url, response.status_code, response.headers.get('Retry-After'))
+            # httpx 对 3xx 也会抛异常，条件请求的 304 交给调用方使用本地副本
+            if raise_for_status and response.status_code != 304:
+                response.raise_for_status()
+
+            if encoding is not None:
+                response.encoding = encoding
+            elif res_type == 'text':
+                response.encoding = self.encoding_detector.resolve(response)
+        except httpx.HTTPError as e:
+            self.log.error(f"request failed: {e}")
+            raise JobException(e)  # 触发 retry 装饰器重试
+        return response
+
     def _tls_client(self,
                     url: str,
                     method: str = 'GET',
@@ -319,30 +632,35 @@ class JobBase(metaclass=JobBaseMeta, ConcurrentExecutor):
                     timeout: Union[int, float] = 30,
                     allow_redirects: bool = True,
                     proxies: Optional[Dict[str, str]] = None,
+                    proxy_session: Optional[str] = None,
                     ):
         try:
-            ja3_string = "771,4865-4866-4867-49195-XXXXX-49196-49200-YYYYY-52392-49171-49172-156-157-47-53,0-23-ZZZZZ-10-11-35-16-5-13-18-51-45-43-27-17513,29-23-24,0"
-            ja3_string = ja3_string.replace('XXXXX', str(random.randint(49234, 65231))).replace('YYYYY', str(
-                random.randint(49234, 65231))).replace('ZZZZZ', str(random.randint(49234, 65231)))
-            tsess = tls_client.Session(ja3_string=ja3_string, random_tls_extension_order=True)
-            response = tsess.execute_request(
-                method=method,
-                url=url,
-                params=params,
-                data=data,
-                json=json_data,
-                cookies=cookies,
-                headers=headers,
-                timeout_seconds=timeout,
-                proxy=proxies,
-                allow_redirects=allow_redirects
-            )
-        except RequestException as e:
+            # 从会话池借出带固定随机指纹的会话，出错时该会话退役换新指纹
+            with self.rate_limiter.acquire(url), self._proxy_lease(proxies, proxy_session) as lease, \
+                    self.tls_session_pool.session() as tsess:
+                try:
+                    response = tsess.execute_request(
+                        method=method,
+                        url=url,
+                        params=params,
+                        data=data,
+                        json=json_data,
+                        cookies=cookies,
+                        headers=headers,
+                        timeout_seconds=timeout,
+                        proxy=lease.proxies,
+                        allow_redirects=allow_redirects
+                    )
+                except IOError:
+                    self.rate_limiter.observe(url, error=True)
+                    raise
+                lease.observe(response.status_code)
+                self.rate_limiter.observe(url, response.status_code, response.headers.get('Retry-After'))
+        except (RequestException, IOError) as e:  # tls_client 的异常均继承自 IOError
             self.log.error(f"request failed: {e}")  # 可选日志记录
             raise JobException(e)  # 触发 retry 装饰器重试
         return response
 
-    @retry(3)
     def download_page_tls_client(self,
                                  url: str,
                                  method: str = 'GET',
@@ -361,25 +679,48 @@ class JobBase(metaclass=JobBaseMeta, ConcurrentExecutor):
                                  raise_for_status: bool = True,
                                  validate_str_list: Optional[List[str]] = None,  # 验证字符串
                                  retry_count=3,
+                                 cache: Optional[bool] = None,
+                                 cache_ttl: Optional[float] = None,
+                                 proxy_session: Optional[str] = None,
                                  ) -> Union[str, dict, bytes]:
-        res = self._read_dump(dump_file_name=dump_file_name, read_dump=read_dump)
-        # 若缓存不存在或强制刷新，则发起请求
-        if res is None or not read_dump:
-            response = self._tls_client(url=url,
-                                        method=method,
-                                        params=params,
-                                        data=data,
-                                        json_data=json_data,
-                                        cookies=cookies,
-                                        headers=headers,
-                                        timeout=timeout,
-                                        allow_redirects=allow_redirects,
-                                        proxies=proxies)
-            res = self._handle_response(url=url, response=response, res_type=res_type,
-                                        dump_file_name=dump_file_name, validate_str_list=validate_str_list)
-        return res
+        # 与方法同名，重试日志中的名称保持不变
+        def download_page_tls_client():
+            res = self._read_dump(dump_file_name=dump_file_name, read_dump=read_dump)
+            # 若缓存不存在或强制刷新，则发起请求
+            if res is None or not read_dump:
+                key = self._response_cache_key(cache, method, url, params, data, json_data, res_type)
+                res = self._read_response_cache(key, read_dump, dump_file_name, res_type)
+                if res is not None:
+                    return res
+                response = self._tls_client(url=url,
+                                            method=method,
+                                            params=params,
+                                            data=data,
+                                            json_data=json_data,
+                                            cookies=cookies,
+                                            headers=self._revalidation_headers(key, read_dump, method, headers),
+                                            timeout=timeout,
+                                            allow_redirects=allow_redirects,
+                                            proxies=proxies,
+                                            proxy_session=proxy_session)
+                res = self._read_revalidated(key, url, response, dump_file_name, res_type, cache_ttl)
+                if res is not None:
+                    return res
+                res = self._handle_response(url=url, response=response, res_type=res_type,
+                                            dump_file_name=dump_file_name, validate_str_list=validate_str_list)
+                self._write_response_cache(key, res, res_type, cache_ttl, response)
+            return res
+
+        flight_key = self._flight_key('tls_client', method=method.upper(), url=url, params=params, data=data,
+                                      json_data=json_data, headers=headers, cookies=cookies,
+                                      allow_redirects=allow_redirects, proxies=proxies, proxy_session=proxy_session,
+                                      dump_file_name=dump_file_name, res_type=res_type, read_dump=read_dump,
+                                      validate_str_list=validate_str_list, cache=cache, cache_ttl=cache_ttl,
+                                      retry_count=retry_count)
+        # 合并在重试之外：重试、熔断和预算只按实际执行的请求计算
+        return self.single_flight.do(flight_key, self.retry_policy.call, download_page_tls_client, url=url,
+                                     retries=retry_count)
 
-    @retry(3)
     def download_page(
             self,
             url: str,
@@ -397,7 +738,12 @@ class JobBase(metaclass=JobBaseMeta, ConcurrentExecutor):
             res_type: str = 'text',
             read_dump: bool = True,
             raise_for_status: bool = True,
-            validate_str_list: Optional[List[str]] = None
+            validate_str_list: Optional[List[str]] = None,
+            cache: Optional[bool] = None,
+            cache_ttl: Optional[float] = None,
+            transport: Optional[str] = None,
+            proxy_session: Optional[str] = None,
+            retry_count: int = 3,
     ) -> Union[str, dict, bytes]:
         """
         发送 GET 请求获取网页内容，支持缓存、自动重试和多种返回格式。
@@ -413,12 +759,17 @@ class JobBase(metaclass=JobBaseMeta, ConcurrentExecutor):
             timeout (int/float, optional): 请求超时时间（秒），默认为 10。
             encoding (str, optional): 手动指定响应编码（如 'utf-8'、'gbk'），默认自动检测。
             allow_redirects (bool, optional): 是否允许重定向，默认为 True。
-            proxies (dict, optional): 代理配置（如 {'http': 'http://10.10.1.10:3128'}）。
+            proxies (dict, optional): 代理配置（如 {'http': 'http://10.10.1.10:3128'}），默认从任务的代理池选择。
             dump_file_name (str, optional): 缓存文件名，若存在则优先读取缓存。
             res_type (str, optional): 返回类型，可选 'text'（文本）、'json'（字典）、'content'（二进制），默认为 'text'。
             read_dump (bool, optional): 是否读取缓存，默认为 True。
             raise_for_status (bool, optional): 是否在 HTTP 错误码时抛出异常，默认为 True。
             validate_str_list(str,optional): 根据传入的str，对响应进行校验，决定是否重试, 任一str符合即可
+            cache (bool, optional): 是否使用按请求内容寻址的响应缓存（跨日期复用），默认使用任务的 cache_responses。
+            cache_ttl (int/float, optional): 本次写入响应缓存的有效期（秒），默认使用任务的 response_cache_ttl。
+            transport (str, optional): 传输方式 'requests'（HTTP/1.1）或 'h2'（HTTP/2），默认使用任务的 http_transport。
+            proxy_session (str, optional): 代理会话标识，相同标识的请求固定使用代理池中的同一个代理（如需保持登录态）。
+            retry_count (int, optional): 重试次数，默认为 3。
         Returns:
             str/dict/bytes: 根据 res_type 返回响应内容。
 
@@ -427,25 +778,161 @@ class JobBase(metaclass=JobBaseMeta, ConcurrentExecutor):
             requests.exceptions.RequestException: 网络请求异常。
             requests.exceptions.HTTPError: 当 raise_for_status=True 时，HTTP 状态码非 2xx 抛出。
         """
-        # 尝试读取缓存文件（当不强制刷新时）
-        res = self._read_dump(dump_file_name=dump_file_name, read_dump=read_dump)
-        # 若缓存不存在或强制刷新，则发起请求
-        if res is None or not read_dump:
-            response = self._requests(url=url,
-                                      method=method,
-                                      params=params,
-                                      data=data,
-                                      json_data=json_data,
-                                      cookies=cookies,
-                                      proxies=proxies,
-                                      headers=headers,
-                                      timeout=timeout,
-                                      encoding=encoding,
-                                      allow_redirects=allow_redirects,
-                                      raise_for_status=raise_for_status)
-            res = self._handle_response(url=url, response=response, res_type=res_type,
-                                        dump_file_name=dump_file_name, validate_str_list=validate_str_list)
-        return res
+        transport = transport or self.http_transport
+        if transport not in ('requests', 'h2'):
+            raise ValueError(f"不支持的 transport: {transport}")
+        send = self._http2 if transport == 'h2' else self._requests
+
+        # 与方法同名，重试日志中的名称保持不变
+        def download_page():
+            # 尝试读取缓存文件（当不强制刷新时）
+            res = self._read_dump(dump_file_name=dump_file_name, read_dump=read_dump)
+            # 若缓存不存在或强制刷新，则发起请求
+            if res is None or not read_dump:
+                key = self._response_cache_key(cache, method, url, params, data, json_data, res_type)
+                res = self._read_response_cache(key, read_dump, dump_file_name, res_type)
+                if res is not None:
+                    return res
+                response = send(url=url,
+                                method=method,
+                                params=params,
+                                data=data,
+                                json_data=json_data,
+                                cookies=cookies,
+                                proxies=proxies,
+                                headers=self._revalidation_headers(key, read_dump, method, headers),
+                                timeout=timeout,
+                                encoding=encoding,
+                                allow_redirects=allow_redirects,
+                                raise_for_status=raise_for_status,
+                                res_type=res_type,
+                                proxy_session=proxy_session)
+                res = self._read_revalidated(key, url, response, dump_file_name, res_type, cache_ttl)
+                if res is not None:
+                    return res
+                res = self._handle_response(url=url, response=response, res_type=res_type,
+                                            dump_file_name=dump_file_name, validate_str_list=validate_str_list)
+                self._write_response_cache(key, res, res_type, cache_ttl, response)
+            return res
+
+        # 同一请求 + dump 同一时间只抓取一次，其余线程等待共享结果
+        flight_key = self._flight_key(transport, method=method.upper(), url=url, params=params, data=data,
+                                      json_data=json_data, headers=headers, cookies=cookies, encoding=encoding,
+                                      allow_redirects=allow_redirects, proxies=proxies, proxy_session=proxy_session,
+                                      dump_file_name=dump_file_name, res_type=res_type, read_dump=read_dump,
+                                      raise_for_status=raise_for_status, validate_str_list=validate_str_list,
+                                      cache=cache, cache_ttl=cache_ttl, retry_count=retry_count)
+        # 合并在重试之外：等待者共享执行者重试后的最终结果，重试、熔断和预算只按实际执行的请求计算
+        return self.single_flight.do(flight_key, self.retry_policy.call, download_page, url=url,
+                                     retries=retry_count)
+
+    @retry(3)
+    def download_file(self,
+                      url: str,
+                      dump_file_name: str,
+                      method: str = 'GET',
+                      params: Optional[Dict] = None,
+                      headers: Optional[Dict[str, str]] = None,
+                      cookies: Optional[Dict[str, str]] = None,
+                      timeout: Union[int, float] = 30,
+                      proxies: Optional[Dict[str, str]] = None,
+                      read_dump: bool = True,
+                      raise_for_status: bool = True,
+                      sha256: Optional[str] = None,
+                      chunk_size: int = 1024 * 1024,
+                      proxy_session: Optional[str] = None,
+                      ) -> StreamResult:
+        """
+        流式下载大文件到 dump，内存占用与文件大小无关，适合代替 res_type='content' 的 download_page。
+
+        Args:
+            url (str): 目标 URL 地址。
+            dump_file_name (str): dump 文件名，下载过程中写入同目录的 .part 文件，完成后改名（打包存储时追加到段文件）。
+            read_dump (bool, optional): dump 已存在时直接返回，默认为 True。
+            sha256 (str, optional): 期望的 sha256，不一致时删除已下载内容并抛出异常重试。
+            chunk_size (int, optional): 每次读取写入的字节数。
+            其余参数同 download_page。
+        Returns:
+            StreamResult(file_name, path, size, sha256, resumed)；重试时通过 Range 请求从 .part 已有的字节处续传。
+        """
+        save_path = os.path.join(self.folder, self.date, dump_file_name)
+        packed_name = dump_file_name.replace(os.sep, '/')
+        if read_dump:
+            if self.dump_store == 'packed' and self.packed_store().exists(packed_name):
+                view = self.get_dump_view(dump_file_name)
+                return StreamResult(dump_file_name, None, len(view), hashlib.sha256(view).hexdigest(), False)
+            if self.dump_store != 'packed' and os.path.exists(save_path):
+                return StreamResult(dump_file_name, save_path, os.path.getsize(save_path), file_sha256(save_path),
+                                    False)
+        os.makedirs(os.path.dirname(save_path), exist_ok=True)
+        download = ResumableDownload(f"{save_path}.part", chunk_size=chunk_size)
+
+        def send(lease, extra_headers: Dict[str, str]):
+            # Range 按原始字节计算，不接受压缩编码
+            request_headers = {'Accept-Encoding': 'identity', **(headers or {}), **extra_headers}
+            try:
+                response = self.session_pool.request(method, url, params=params, headers=request_headers,
+                                                     cookies=cookies, timeout=timeout, proxies=lease.proxies,
+                                                     stream=True)
+            except (ReadTimeout, ConnectTimeout, RequestsConnectionError):
+                self.rate_limiter.observe(url, error=True)
+                raise
+            lease.observe(response.status_code)
+            self.rate_limiter.observe(url, response.status_code, response.headers.get('Retry-After'))
+            return response
+
+        try:
+            status_error = None
+            # 限速许可和代理租约覆盖整个响应体的读取：host 并发上限同样约束同时进行的大文件下载，传输中断也计入代理的健康度
+            with self.rate_limiter.acquire(url), self._proxy_lease(proxies, proxy_session) as lease:
+                try:
+                    size, digest, resumed = download.run(lambda extra_headers: send(lease, extra_headers),
+                                                         raise_for_status=raise_for_status)
+                except HTTPError as e:
+                    # 状态码错误已由 lease.observe 判断，不记为代理失败
+                    status_error = e
+            if status_error is not None:
+                raise status_error
+        except (RequestException, IOError) as e:
+            self.log.error(f"download failed: {e}, url: {url}")
+            raise JobException(e)  # 触发 retry 装饰器重试，保留 .part 续传
+        if sha256 is not None and digest != sha256.lower():
+            download.discard()
+            raise JobException(f"sha256 不一致: {digest} != {sha256}, url: {url}")
+        self.dump_cache.invalidate((self.date, dump_file_name))
+        if self.dump_store == 'packed':
+            self.packed_store().write_file(packed_name, download.part_path)
+            download.discard()
+            save_path = None
+        else:
+            download.finish(save_path)
+        self.log.success(f'Downloaded {dump_file_name} ({size} bytes{", resumed" if resumed else ""})')
+        return StreamResult(dump_file_name, save_path, size, digest, resumed)
+
+    def fetch_many(self, specs: Iterable[Union[str, dict]], concurrency: int = 16,
+                   retry_count: int = 3) -> Iterator[FetchResult]:
+        """
+        基于 asyncio 的批量抓取，缓存、校验和 dump 语义与 download_page 一致，按完成顺序返回结果。
+
+        Args:
+            specs: 请求描述，url 字符串或 download_page 参数组成的字典（可额外指定 retry_count），可以是生成器
+            concurrency: 最大在途请求数，不需要为每个请求占用一个线程
+            retry_count: 默认重试次数
+        Returns:
+            FetchResult(spec, result, error) 迭代器，result 与 download_page 返回值一致，重试耗尽时 error 为最后的异常
+
+        示例:
+            for spec, res, error in self.fetch_many(({'url': url, 'res_type': 'json'} for url in urls), 32):
+                ...
+        """
+        return AsyncFetcher(self, concurrency=concurrency, retry_count=retry_count).iter_sync(specs)
+
+    def afetch_many(self, specs: Iterable[Union[str, dict]], concurrency: int = 16,
+                    retry_count: int = 3) -> AsyncIterator[FetchResult]:
+        """
+        fetch_many 的异步版本，在已运行的事件循环中使用: async for spec, res, error in self.afetch_many(...)
+        """
+        return AsyncFetcher(self, concurrency=concurrency, retry_count=retry_count).iter_results(specs)
 
     def dump(self, res_text, file_name: str, res_type: str = "text"):
         """
@@ -466,14 +953,23 @@ class JobBase(metaclass=JobBaseMeta, ConcurrentExecutor):
         missing = [name for name, val in (("folder", self.folder), ("date", self.date)) if not val]
         if missing:
             raise ValueError(f"Missing required argument(s): {', '.join(missing)}")
-        # 自动创建父目录（如果不存在）
         save_folder = os.path.join(self.folder, self.date)
+        self.dump_cache.invalidate((self.date, file_name))
+        if self.dump_store == 'packed':
+            self.packed_store().write(file_name.replace(os.sep, '/'), encode_dump(res_text, res_type, self.dump_codec),
+                                      res_type)
+            self.log.success(f'Saved file {file_name} to {save_folder}/{PACKED_DIR}')
+            return
+        # 自动创建父目录（如果不存在）
         file_path = os.path.join(save_folder, file_name)
         file_dir = os.path.dirname(file_path)
         if file_dir:  # 确保目录路径非空
             os.makedirs(file_dir, exist_ok=True)
         # 处理不同内容类型
-        if res_type == "text":
+        if self.dump_codec is not None:
+            with open(file_path, "wb") as f:
+                f.write(self.dump_codec.encode(res_text, res_type))
+        elif res_type == "text":
             with open(file_path, "w", encoding="utf-8", errors="replace") as f:
                 f.write(str(res_text))
         elif res_type == "json":
@@ -509,36 +1005,65 @@ class JobBase(metaclass=JobBaseMeta, ConcurrentExecutor):
         missing = [name for name, val in (("folder", self.folder), ("date", target_date)) if not val]
         if missing:
             raise ValueError(f"Missing required argument(s): {', '.join(missing)}")
+        memory_key = (target_date, file_name)
+        cached = self.dump_cache.get(memory_key)
+        if cached is not None:
+            if check_exists:
+                return True
+            # json 缓存的是解码后的 utf-8 字节，每次重新解析，避免调用方修改共享对象
+            return loads_json(cached[1]) if cached[0] == 'json' else cached[1]
         # 构建完整文件路径
         save_dir = os.path.join(self.folder, target_date)
         save_path = os.path.join(save_dir, file_name)
-        # 检查文件是否存在
-        if not os.path.exists(save_path):
+        # 没有打包目录的日期不创建存储，直接按文件方式查找
+        if self.dump_store == 'packed' and (target_date in self._packed_stores
+                                            or os.path.isdir(os.path.join(save_dir, PACKED_DIR))):
+            packed = self.packed_store(target_date).read(file_name.replace(os.sep, '/'))
+            if packed is not None:
+                if check_exists:
+                    return True
+                self.logger.success(f'Success read cache {file_name} form {save_dir}/{PACKED_DIR}')
+                return self._decode_and_cache(memory_key, packed[0], file_name)
+        if check_exists:
+            if os.path.exists(save_path):
+                return True
             self.logger.warning(f"File not found: {save_path}")
             return None
-        if check_exists and os.path.exists(save_path):
-            return True
         try:
-            # 获取文件扩展名
-            _, ext = os.path.splitext(file_name)
-            ext = ext.lower()  # 统一小写处理
-            content = None
-            if ext == '.json':
-                import json
-                with open(save_path, "r", encoding="utf-8") as f:
-                    content = json.load(f)
-            elif ext in [v.lower() for v in content_type_ext.values()]:
-                with open(save_path, "rb") as f:
-                    content = f.read()
-            else:  # 默认按文本处理
-                with open(save_path, "r", encoding="utf-8") as f:
-                    content = f.read()
+            # 按文件头识别编码格式（兼容旧格式），返回类型由文件扩展名决定
+            with open(save_path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            self.logger.warning(f"File not found: {save_path}")
+            return None
+        try:
+            content = self._decode_and_cache(memory_key, data, file_name)
             self.logger.success(f'Success read cache {file_name} form {save_dir}')
             return content
         except Exception as e:
             self.logger.exception(f"Error reading file {save_path}: {str(e)}")
             raise  # 重新抛出异常
 
+    def _decode_and_cache(self, memory_key: tuple, data: bytes, file_name: str):
+        if res_type_of(file_name) == 'json':
+            body = decode_body(data)
+            content = loads_json(body)
+            self.dump_cache.put(memory_key, ('json', body), len(body))
+        else:
+            content = decode_dump(data, file_name)
+            # 按解压后的大小计入缓存，压缩过的 dump 不能按磁盘上的字节数计
+            size = len(content.encode('utf-8')) if isinstance(content, str) else len(content)
+            self.dump_cache.put(memory_key, ('value', content), size)
+        return content
+
+    def get_dump_view(self, file_name: str, date=None) -> Optional[memoryview]:
+        """
+        零拷贝读取打包存储中的原始内容（适合大的二进制 dump），返回的 memoryview 在任务 close 前有效；
+        不在打包存储中时返回 None
+        """
+        view = self.packed_store(date).read_view(file_name.replace(os.sep, '/'))
+        return body_view(view[0]) if view is not None else None
+
     def sanitize_filename(self, filename, replacement_text="_", max_length=255, platform="auto"):
         """
         确保文件名合理化，处理非法字符、保留名称和长度限制
@@ -132,6 +132,9 @@ class JobRunner:
         except Exception as e:
             logger.exception(f"Job failed: JobId:{self.job_id} RunId:{self.run_id} - {str(e)}")
             raise
+        finally:
+            # 写入缓冲未落库的数据，关闭 HTTP 会话
+            self.job_instance.close()
 
     def _task_callback(self, future):
         """任务完成回调处理"""
@@ -151,6 +154,7 @@ class JobRunner:
                 history['Status'] = JobStatus.COMPLETED
             EndTime = str(time.strftime("%Y-%m-%d %H:%M:%S", time.localtime()))
             history['EndTime'] = EndTime
+            history['Stats'] = self.job_instance.stats()
             self.job_instance.logger.warning(
                 f"Job finished, JobName:{history.get('JobName')} JobId:{self.job_id} RunId:{self.run_id} EndTime:{EndTime}"
             )
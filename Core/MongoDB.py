@@ -5,17 +5,196 @@
 @file: MongoDB.py
 @time: 2025/06/15
 """
+import atexit
+import contextlib
 import copy
 import hashlib
 import os
+import re
 import threading
 import time
 from concurrent.futures import ThreadPoolExecutor
-from typing import List, Optional
+from typing import List, Optional, Dict, Tuple, Iterator, Callable
 from pymongo.errors import BulkWriteError
 import pymongo.errors
 from loguru import logger
-from pymongo import MongoClient, InsertOne, UpdateOne, ASCENDING, DESCENDING
+from pymongo import MongoClient, InsertOne, UpdateOne, ReplaceOne, ASCENDING, DESCENDING
+from pymongo import monitoring
+from bson import ObjectId
+
+from Core.BufferedWriter import BufferedWriter
+from Core.Config import MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE
+
+
+class _PoolStatsListener(monitoring.ConnectionPoolListener):
+    """
+    连接池事件监听器，统计单个 MongoClient 的连接池使用情况，用于评估 maxPoolSize
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.created = 0  # 累计创建的连接数
+        self.closed = 0  # 累计关闭的连接数
+        self.checked_out = 0  # 当前借出的连接数
+        self.max_checked_out = 0  # 借出连接数峰值
+        self.check_out_failed = 0  # 借出失败次数（含等待超时）
+        self.pool_clears = 0  # 连接池被清空的次数（不能与 pool_cleared 回调同名）
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pool_clears += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self._lock:
+            self.created += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.closed += 1
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.check_out_failed += 1
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.checked_out += 1
+            self.max_checked_out = max(self.max_checked_out, self.checked_out)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'open': self.created - self.closed,
+                'created': self.created,
+                'closed': self.closed,
+                'checked_out': self.checked_out,
+                'max_checked_out': self.max_checked_out,
+                'check_out_failed': self.check_out_failed,
+                'pool_cleared': self.pool_clears,
+            }
+
+
+class MongoClientRegistry:
+    """
+    进程级共享 MongoClient 注册表
+    按 uri + 用户名密码 + 连接池参数复用同一个线程安全的 MongoClient，
+    通过引用计数管理生命周期，最后一个使用者释放时才真正关闭连接。
+    """
+    _clients: Dict[tuple, dict] = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _make_key(uri: str, username: str = None, password: str = None, **options) -> tuple:
+        return uri, username, password, tuple(sorted(options.items()))
+
+    @classmethod
+    def acquire(cls,
+                uri: str,
+                username: str = None,
+                password: str = None,
+                max_pool_size: int = None,
+                min_pool_size: int = None,
+                **options) -> Tuple[tuple, MongoClient]:
+        """
+        获取共享的 MongoClient，引用计数 +1
+        :param uri: MongoDB 连接 uri
+        :param username: 用户名
+        :param password: 密码
+        :param max_pool_size: 最大连接池大小，默认读取配置 mongo.max_pool_size
+        :param min_pool_size: 最小连接池大小，默认读取配置 mongo.min_pool_size
+        :param options: 其他 MongoClient 参数
+        :return: (key, client)，key 用于 release
+        """
+        options['maxPoolSize'] = MONGO_MAX_POOL_SIZE if max_pool_size is None else max_pool_size
+        options['minPoolSize'] = MONGO_MIN_POOL_SIZE if min_pool_size is None else min_pool_size
+        key = cls._make_key(uri, username, password, **options)
+        with cls._lock:
+            entry = cls._clients.get(key)
+            if entry is None:
+                listener = _PoolStatsListener()
+                client_kwargs = dict(options)
+                if username and password:
+                    client_kwargs.update(username=username, password=password)
+                client = MongoClient(uri, event_listeners=[listener], **client_kwargs)
+                entry = {'client': client, 'refs': 0, 'listener': listener, 'options': options}
+                cls._clients[key] = entry
+                logger.info(f"创建共享 MongoClient: {cls._mask_uri(uri)}, "
+                            f"maxPoolSize={options['maxPoolSize']}, minPoolSize={options['minPoolSize']}")
+            entry['refs'] += 1
+            return key, entry['client']
+
+    @classmethod
+    def release(cls, key: tuple):
+        """
+        释放共享的 MongoClient，引用计数 -1，归零时关闭连接
+        :param key: acquire 返回的 key
+        """
+        with cls._lock:
+            entry = cls._clients.get(key)
+            if entry is None:
+                return
+            entry['refs'] -= 1
+            if entry['refs'] > 0:
+                return
+            cls._clients.pop(key)
+        entry['client'].close()
+        logger.info(f"共享 MongoClient 已关闭: {cls._mask_uri(key[0])}")
+
+    @classmethod
+    def close_all(cls):
+        """
+        关闭所有共享的 MongoClient（进程退出时调用）
+        """
+        with cls._lock:
+            entries = list(cls._clients.values())
+            cls._clients.clear()
+        for entry in entries:
+            try:
+                entry['client'].close()
+            except Exception as e:
+                logger.exception(f"关闭MongoDB连接时发生错误: {e}")
+
+    @classmethod
+    def pool_stats(cls) -> List[dict]:
+        """
+        返回每个共享 MongoClient 的引用数和连接池统计，用于评估 maxPoolSize
+        """
+        with cls._lock:
+            entries = list(cls._clients.items())
+        return [{
+            'uri': cls._mask_uri(key[0]),
+            'refs': entry['refs'],
+            'max_pool_size': entry['options']['maxPoolSize'],
+            'min_pool_size': entry['options']['minPoolSize'],
+            **entry['listener'].stats(),
+        } for key, entry in entries]
+
+    @staticmethod
+    def _mask_uri(uri: str) -> str:
+        # 隐藏 uri 中的密码
+        return re.sub(r'://([^:/@]+):[^@]+@', r'://\1:****@', uri)
+
+
+atexit.register(MongoClientRegistry.close_all)
 
 
 class DocumentList:
@@ -29,13 +208,21 @@ class DocumentList:
             raise TypeError("documents 必须是列表类型")
         self.documents = documents if documents else []
 
+    @staticmethod
+    def _stringify_id(doc: dict) -> dict:
+        """
+        将单个文档的 _id 字段转换为字符串，方便序列化
+        """
+        if '_id' in doc:
+            doc['_id'] = str(doc['_id'])
+        return doc
+
     def _convert_id_to_str(self):
         """
         内部方法：将所有文档的 _id 字段转换为字符串，方便序列化
         """
         for doc in self.documents:
-            if '_id' in doc:
-                doc['_id'] = str(doc['_id'])
+            self._stringify_id(doc)
 
     def _validate_index(self, index: int):
         """
@@ -84,17 +271,63 @@ class DocumentList:
 
 
 class CollectionWrapper:
-    def __init__(self, db_name: str, collection, log_enabled=True):
+    # 进程级共享的集合锁，同一个 (db, collection) 的所有句柄共用一把锁
+    _locks: Dict[Tuple[str, str], threading.RLock] = {}
+    _locks_guard = threading.Lock()
+    # 进程内已确保存在的索引，避免每次查询都 create_index
+    _ensured_indexes: Dict[tuple, str] = {}
+
+    def __init__(self, db_name: str, collection, log_enabled=True, lock_free=True):
         """
         初始化 CollectionWrapper 对象
         :param db_name: str 数据库名称
         :param collection: 集合对象
+        :param lock_free: 普通读写是否不加锁（pymongo 集合本身线程安全），默认 True；
+                          为 False 时所有读写都在集合锁内串行执行。复合的读-改-写操作始终加锁。
         """
         self.db_name = db_name
         self.collection_name = collection.name
         self.collection = collection
-        self.rlock = threading.RLock()  # 为每个集合添加锁
+        self.rlock = self._shared_lock(db_name, collection.name)  # 同一集合共享锁
         self.log_enabled = log_enabled  # 添加日志开关
+        self.lock_free = lock_free
+        self._writer: Optional[BufferedWriter] = None
+
+    def writer(self, **kwargs) -> BufferedWriter:
+        """
+        获取该集合的写后缓冲写入器（每个句柄一个），多线程的小批量保存可合并为批量写入
+        :param kwargs: 首次创建时传给 BufferedWriter 的参数，如 max_batch、flush_interval、max_queue、on_error
+        """
+        with self.rlock:
+            if self._writer is None or self._writer._closed:
+                kwargs.setdefault('log_enabled', self.log_enabled)
+                self._writer = BufferedWriter(self.collection, **kwargs)
+            return self._writer
+
+    def close_writer(self):
+        """
+        写入缓冲中剩余的数据并关闭写入器
+        """
+        if self._writer is not None:
+            self._writer.close()
+
+    def _op_lock(self):
+        """
+        普通读写使用的锁：lock_free 模式下为空上下文，否则为集合共享锁
+        """
+        return contextlib.nullcontext() if self.lock_free else self.rlock
+
+    @classmethod
+    def _shared_lock(cls, db_name: str, collection_name: str) -> threading.RLock:
+        """
+        获取 (db, collection) 对应的共享锁，不存在则创建
+        """
+        key = (db_name, collection_name)
+        with cls._locks_guard:
+            lock = cls._locks.get(key)
+            if lock is None:
+                lock = cls._locks[key] = threading.RLock()
+            return lock
 
     def __getitem__(self, key):
         """
@@ -132,6 +365,19 @@ class CollectionWrapper:
             query = {}
         return int(self.collection.count_documents(query))
 
+    def aggregate(self, pipeline) -> DocumentList:
+        """
+        聚合查询
+        :param pipeline: a list of aggregation pipeline stages
+        """
+        return self._aggregate(pipeline)
+
+    def count(self, query: dict = None) -> int:
+        """
+        根据给定的查询条件（query）统计文档数量，默认统计全部文档。
+        """
+        return self._count(query)
+
     @staticmethod
     def remove_duplicates(dict_list, distinct_key):
         """
@@ -152,6 +398,47 @@ class CollectionWrapper:
 
         return unique_list
 
+    def ensure_index(self, keys: list, **kwargs) -> str:
+        """
+        确保索引存在，同一进程内相同的索引只会向服务器提交一次 create_index
+        :param keys: 索引键列表，如 [('JobId', ASCENDING)]
+        :param kwargs: create_index 的其他参数，如 unique=True
+        :return: 索引名称
+        """
+        key = (self.db_name, self.collection_name, tuple(keys), tuple(sorted(kwargs.items())))
+        with CollectionWrapper._locks_guard:
+            index_name = CollectionWrapper._ensured_indexes.get(key)
+        if index_name is None:
+            index_name = self.collection.create_index(keys, **kwargs)
+            with CollectionWrapper._locks_guard:
+                CollectionWrapper._ensured_indexes[key] = index_name
+        return index_name
+
+    @staticmethod
+    def _distinct_pipeline(distinct_key: str,
+                           query: dict = None,
+                           projection: dict = None,
+                           sort: list = None,
+                           skip: int = 0,
+                           limit: int = 0) -> list:
+        """
+        构建服务端去重聚合管道：按 sort 排序后每个 distinct_key 取第一条，
+        再按 sort 排序并分页（$group 不保证输出顺序）
+        """
+        pipeline = [{'$match': {'$and': [query or {}, {distinct_key: {'$exists': True}}]}}]
+        if sort:
+            pipeline.append({'$sort': dict(sort)})
+        pipeline.append({'$group': {'_id': f'${distinct_key}', '_doc': {'$first': '$$ROOT'}}})
+        pipeline.append({'$replaceRoot': {'newRoot': '$_doc'}})
+        pipeline.append({'$sort': dict(sort) if sort else {'_id': ASCENDING}})
+        if skip:
+            pipeline.append({'$skip': skip})
+        if limit:
+            pipeline.append({'$limit': limit})
+        if projection:
+            pipeline.append({'$project': projection})
+        return pipeline
+
     def find_documents(self,
                        query: dict = None,
                        projection: dict = None,
@@ -177,17 +464,17 @@ class CollectionWrapper:
         start_time = time.perf_counter()
         try:
             if distinct_key is not None:
-                with self.rlock:
-                    self.collection.create_index([(distinct_key, ASCENDING)])
-                    distinct_values = self.collection.distinct(distinct_key, filter=query)
-                    cursor = self.collection.find(query, projection=projection, limit=limit, skip=skip, sort=sort)
-                    data = [doc for doc in cursor if doc[distinct_key] in distinct_values]
-                    data = self.remove_duplicates(data, distinct_key)
+                self.ensure_index([(distinct_key, ASCENDING)])
+                pipeline = self._distinct_pipeline(distinct_key, query=query, projection=projection,
+                                                   sort=sort, skip=skip, limit=limit)
+                with self._op_lock():
+                    cursor = self.collection.aggregate(pipeline, allowDiskUse=True, batchSize=10000)
+                    data = [doc for doc in cursor]
             else:
-                with self.rlock:
-                    cursor = self.collection.find(query, projection=projection, limit=limit, skip=skip, sort=sort)
+                with self._op_lock():
+                    cursor = self.collection.find(query, projection=projection, limit=limit, skip=skip, sort=sort,
+                                                  batch_size=10000)  # batch_size 需在迭代前设置才生效
                     data = [doc for doc in cursor]
-            cursor.batch_size = 10000  # 或根据实际情况调整 batch_size
             logger.info(f"{self.db_name}:{self.collection_name} 查询到 {len(data)} 条数据, "
                         f"耗时: {time.perf_counter() - start_time:.6f} 秒")
             return DocumentList(data)
@@ -203,6 +490,63 @@ class CollectionWrapper:
             logger.exception(f"查询数据时发生未知错误: {e}")
         return None
 
+    def iter_documents(self,
+                       query: dict = None,
+                       projection: dict = None,
+                       sort: list = None,
+                       limit: int = 0,
+                       batch_size: int = 1000,
+                       no_cursor_timeout: bool = False,
+                       resume_after=None,
+                       str_id: bool = False,
+                       distinct_key: str = None) -> Iterator[dict]:
+        """
+        以生成器方式流式遍历查询结果，内存占用只与 batch_size 有关，适合导出和重新处理等场景。
+
+        参数:
+            query (dict): 查询条件，使用 MongoDB 查询语法。
+            projection (dict, optional): 返回字段投影。
+            sort (list, optional): 排序；指定 resume_after 时只能按 _id 升序。
+            limit (int, optional): 返回结果的最大数量，默认不限制。
+            batch_size (int, optional): 每批从服务器拉取的文档数，默认1000。
+            no_cursor_timeout (bool, optional): 是否禁止服务器回收空闲游标，长时间处理时使用。
+            resume_after (ObjectId|str, optional): 从该 _id 之后继续遍历（按 _id 升序），用于中断后续跑。
+            str_id (bool, optional): 是否将每个文档的 _id 转换为字符串，同 DocumentList.dict()。
+            distinct_key (str, optional): 根据某个key的value在服务端去重，每个值保留排序后的第一条。
+        返回:
+            Iterator[dict]: 逐个返回匹配的文档。
+        """
+        if query is None:
+            query = {}
+        if resume_after is not None:
+            if sort and list(sort) != [('_id', ASCENDING)]:
+                raise ValueError("指定 resume_after 时只能按 _id 升序排序")
+            if isinstance(resume_after, str) and ObjectId.is_valid(resume_after):
+                resume_after = ObjectId(resume_after)
+            resume_query = {'_id': {'$gt': resume_after}}
+            query = {'$and': [query, resume_query]} if query else resume_query
+            sort = [('_id', ASCENDING)]
+
+        start_time = time.perf_counter()
+        count = 0
+        if distinct_key is not None:
+            self.ensure_index([(distinct_key, ASCENDING)])
+            pipeline = self._distinct_pipeline(distinct_key, query=query, projection=projection,
+                                               sort=sort, limit=limit)
+            cursor = self.collection.aggregate(pipeline, allowDiskUse=True, batchSize=batch_size)
+        else:
+            cursor = self.collection.find(query, projection=projection, sort=sort, limit=limit,
+                                          batch_size=batch_size, no_cursor_timeout=no_cursor_timeout)
+        try:
+            for doc in cursor:
+                count += 1
+                yield DocumentList._stringify_id(doc) if str_id else doc
+        finally:
+            cursor.close()
+            if self.log_enabled:
+                logger.info(f"{self.db_name}:{self.collection_name} 流式遍历 {count} 条数据, "
+                            f"耗时: {time.perf_counter() - start_time:.6f} 秒")
+
     def update_documents(self, data_dict, query_key: str):
         """
         根据传入的字典的某个key的值进行查询，判断是否已经存在相同记录，
@@ -226,23 +570,17 @@ class CollectionWrapper:
             if query_value is None:
                 raise ValueError(f"{collection_info} 指定的查询键'{query_key}'在传入的记录数据中不存在或其值为None")
 
-            with self.rlock:
-                existing_document = self.collection.find_one({query_key: query_value})
-
-            if existing_document is not None:
-                # 合并现有记录和新数据
-                update_data = {**existing_document, **data_dict}
-                # 去掉 _id 字段以避免 MongoDB 错误
-                update_data.pop('_id', None)
-                update_filter = {query_key: query_value}
-                with self.rlock:
-                    result = self.collection.update_one(update_filter, {'$set': update_data})
-                operation_result = f"数据成功更新到mongodb {collection_info}, 耗时: {time.perf_counter() - start_time:.6f} 秒"
-                logger.info(f"{operation_result}, {update_data}")
-                return result.modified_count  # 返回修改的记录数
-            else:
+            # $set 只覆盖传入的字段、保留已有字段，单次原子操作，无需先查询再合并
+            update_data = {k: v for k, v in data_dict.items() if k != '_id'}  # 去掉 _id 字段以避免 MongoDB 错误
+            update_filter = {query_key: query_value}
+            with self._op_lock():
+                result = self.collection.update_one(update_filter, {'$set': update_data})
+            if result.matched_count == 0:
                 logger.info(f"{collection_info} 没有找到匹配的记录, 不进行更新操作")
                 return 0  # 返回0表示没有更新任何记录
+            operation_result = f"数据成功更新到mongodb {collection_info}, 耗时: {time.perf_counter() - start_time:.6f} 秒"
+            logger.info(f"{operation_result}, {update_data}")
+            return result.modified_count  # 返回修改的记录数
         except pymongo.errors.PyMongoError as e:
             logger.exception(f"更新数据失败: {str(e)}")
             raise
@@ -274,7 +612,7 @@ class CollectionWrapper:
         start_time = time.perf_counter()
         try:
             if query_key is None:
-                with self.rlock:
+                with self._op_lock():
                     try:
                         result = self.collection.insert_one(data_dict)
                         operation_result = f"1条数据成功保存到mongodb {collection_info}, 耗时: {time.perf_counter() - start_time:.6f} 秒"
@@ -290,27 +628,24 @@ class CollectionWrapper:
                 query_value = data_dict[query_key]
                 if query_value is None:
                     raise ValueError(f"{collection_info} 指定的查询键'{query_key}'在传入的记录数据中不存在")
-                with self.rlock:
-                    existing_document = self.collection.find_one({query_key: query_value}, projection={'_id': 0})
-                if existing_document is not None:
+                # 单次原子 upsert 代替 find_one + update/insert，避免并发时重复插入
+                update_filter = {
+                    query_key: query_value,
+                }
+                update_data = {k: v for k, v in data_dict.items() if k != '_id'}
+                update = {'$set': update_data} if update_data else {'$setOnInsert': update_filter}
+                with self._op_lock():
+                    result = self.collection.update_one(update_filter, update, upsert=True)
+                if result.upserted_id is None:
                     # 更新已有记录
-                    update_filter = {
-                        query_key: query_value,
-                    }
-                    with self.rlock:
-                        result = self.collection.update_one(update_filter, {'$set': data_dict}, upsert=True)
                     _id = 0
                     operation_result = f"数据成功更新到mongodb {collection_info}, 耗时: {time.perf_counter() - start_time:.6f} 秒"
-                    if self.log_enabled:
-                        logger.info(f"{operation_result}, {data_dict}")
                 else:
                     # 插入新记录
-                    with self.rlock:
-                        result = self.collection.insert_one(data_dict)
+                    _id = result.upserted_id
                     operation_result = f"1条数据成功保存到mongodb {collection_info}, 耗时: {time.perf_counter() - start_time:.6f} 秒"
-                    if self.log_enabled:
-                        logger.info(f"{operation_result}, {data_dict}")
-                    _id = result.inserted_id
+                if self.log_enabled:
+                    logger.info(f"{operation_result}, {data_dict}")
             if result:
                 return _id
             else:
@@ -357,7 +692,8 @@ class CollectionWrapper:
         collection_info = f"{self.db_name}:{self.collection_name}"
 
         try:
-            result = self.collection.bulk_write(operations, ordered=False)
+            with self._op_lock():
+                result = self.collection.bulk_write(operations, ordered=False)
             if self.log_enabled:
                 logger.info(f"成功保存到mongodb {collection_info}: "
                             f"插入 {result.inserted_count} 条, "
@@ -368,9 +704,60 @@ class CollectionWrapper:
             logger.exception(f"部分操作失败: {len(bwe.details['writeErrors'])} 个错误")
             return None
 
-    def save_dict_list_to_collection(self, dict_list: List[dict], query_key: str = None):
+    def bulk_upsert(self, dict_list: List[dict], query_key: str, chunk_size: int = 1000) -> dict:
+        """
+        按 query_key 批量 upsert：存在则 $set 更新，不存在则插入。
+        每个分块只需一次无序 bulk_write，不读取集合中已有的 key。
+
+        Args:
+            dict_list (list[dict]): 待保存的数据字典列表。
+            query_key (str): 用于判断记录是否存在的键名。
+            chunk_size (int, optional): 每次 bulk_write 的最大操作数，默认1000。
+        Returns:
+            dict: {'inserted': 新插入数, 'updated': 更新数, 'unchanged': 已存在但内容未变化数,
+                   'upserted_ids': 新插入文档的 _id 列表}
+        """
+        if not isinstance(query_key, str) or not query_key:
+            raise ValueError("query_key 必须是一个非空字符串")
+        if chunk_size <= 0:
+            raise ValueError("chunk_size 必须大于0")
+        collection_info = f"{self.db_name}:{self.collection_name}"
+        start_time = time.perf_counter()
+        counts = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'upserted_ids': []}
+
+        for i in range(0, len(dict_list), chunk_size):
+            # 同一分块内 query_key 相同的记录先合并，避免无序 upsert 重复插入
+            merged = {}
+            for data_dict in dict_list[i:i + chunk_size]:
+                query_value = data_dict.get(query_key)
+                if query_value is None:
+                    raise ValueError(f"{collection_info} 指定的查询键'{query_key}'在传入的记录数据中不存在或其值为None")
+                merged[query_value] = {**merged.get(query_value, {}), **data_dict}
+            operations = []
+            for query_value, data_dict in merged.items():
+                update_data = {k: v for k, v in data_dict.items() if k != '_id'}
+                if not update_data:
+                    continue
+                operations.append(UpdateOne({query_key: query_value}, {'$set': update_data}, upsert=True))
+            if not operations:
+                continue
+            with self._op_lock():
+                result = self.collection.bulk_write(operations, ordered=False)
+            counts['inserted'] += result.upserted_count
+            counts['updated'] += result.modified_count
+            counts['unchanged'] += result.matched_count - result.modified_count
+            counts['upserted_ids'].extend(result.upserted_ids.values())
+
+        if self.log_enabled:
+            logger.info(f"{collection_info} 批量upsert {len(dict_list)} 条数据: "
+                        f"插入 {counts['inserted']} 条, 更新 {counts['updated']} 条, "
+                        f"未变化 {counts['unchanged']} 条, 耗时: {time.perf_counter() - start_time:.6f} 秒")
+        return counts
+
+    def save_dict_list_to_collection(self, dict_list: List[dict], query_key: str = None, chunk_size: int = 1000):
         """
         将字典列表批量保存至 MongoDB。
+        如果提供 query_key，则按 query_key 批量 upsert（见 bulk_upsert），返回新插入数据的 _id 列表。
         """
         if not isinstance(dict_list, list):
             raise TypeError("dict_list 必须是一个列表")
@@ -383,7 +770,7 @@ class CollectionWrapper:
         try:
             if query_key is None:
                 # 直接批量插入，不进行查询和更新
-                with self.rlock:
+                with self._op_lock():
                     result = self.collection.insert_many(dict_list)  # 批量插入
                 if self.log_enabled:
                     logger.info(f"{len(result.inserted_ids)} 条数据成功保存到mongodb {collection_info}, "
@@ -392,33 +779,8 @@ class CollectionWrapper:
             else:
                 if not isinstance(query_key, str):
                     raise ValueError("query_key 必须是一个字符串")
-                # 根据query_key查询出所有的数据的query_key存入list，
-                with self.rlock:
-                    if query_key == '_id':
-                        existing_query_keys = set(
-                            str(doc[query_key]) for doc in self.collection.find({}, {query_key: 1}))
-                    else:
-                        existing_query_keys = set(
-                            doc[query_key] for doc in
-                            self.collection.find({query_key: {"$exists": True}}, {query_key: 1}))
-                # 分割新数据和已存在数据
-                new_data = [data for data in dict_list if data[query_key] not in existing_query_keys]
-                update_data = [data for data in dict_list if data[query_key] in existing_query_keys]
-                logger.info(
-                    f"{collection_info} 查询到 {len(existing_query_keys)} 条记录 新数据: {len(new_data)} 条, 已存在数据: {len(update_data)} 条")
-                # 插入新数据
-                new_result = []
-                if new_data:
-                    with self.rlock:
-                        new_result = self.collection.insert_many(new_data)
-                    if self.log_enabled:
-                        logger.info(f"{len(new_result.inserted_ids)} 条新数据成功保存到mongodb {collection_info}, "
-                                    f"耗时: {time.perf_counter() - start_time:.6f} 秒")
-                # 更新已存在数据
-                if update_data:
-                    for data in update_data:
-                        self.save_dict_to_collection(data, query_key)
-                return new_result.inserted_ids if new_data else []  # 返回新数据的插入ID列表
+                counts = self.bulk_upsert(dict_list, query_key, chunk_size=chunk_size)
+                return counts['upserted_ids']  # 返回新数据的插入ID列表
         except pymongo.errors.BulkWriteError as e:
             logger.exception(f"Failed to save data: {str(e.details)}")
             raise
@@ -433,56 +795,65 @@ class CollectionWrapper:
         return md5.hexdigest()
 
     def delete_documents(self, query: dict = None, skip: int = None, limit: int = None, recyclable: bool = False,
-                         drop_if_empty: bool = False):
+                         drop_if_empty: bool = False, chunk_size: int = 1000,
+                         progress_callback: Callable[[int, int], None] = None):
         """
         删除满足条件的文档并根据需要将其移至回收站。
+        按 _id 分块处理，每块只在内存中保存 _id，移至回收站通过服务端 $merge 完成，
+        并且只删除已成功复制到回收站的文档。
         :param query: 查询条件，字典格式
         :param skip: 跳过指定数量的文档，用于分页。
         :param limit: 返回结果的最大数量，默认返回所有匹配的文档。
         :param recyclable: 是否将文档移至回收站，默认为False
         :param drop_if_empty: 是否在删除所有满足条件的文档后，如果集合为空则删除集合，默认为False
+        :param chunk_size: 每块处理的文档数，默认1000
+        :param progress_callback: 进度回调，参数为 (已删除数量, 待删除总数)
         :return: 删除的文档数量
-
-        Args:
-            limit:
-            skip:
         """
 
         if query is None:
             query = {}
         if self.collection is None:
             raise Exception("未选择集合")
+        if chunk_size <= 0:
+            raise ValueError("chunk_size 必须大于0")
         try:
-            # 查找要删除的文档
-            with self.rlock:
-                if skip is not None and limit is not None:
-                    documents_to_delete = list(self.collection.find(query).skip(skip).limit(limit))
-                elif skip is not None:
-                    documents_to_delete = list(self.collection.find(query).skip(skip))
-                elif limit is not None:
-                    documents_to_delete = list(self.collection.find(query).limit(limit))
-                else:
-                    documents_to_delete = list(self.collection.find(query))
+            count_kwargs = {k: v for k, v in (('skip', skip), ('limit', limit)) if v}
+            total = self.collection.count_documents(query, **count_kwargs)
             # 检查是否有文档需要删除
-            if not documents_to_delete:
+            if total == 0:
                 logger.error("没有满足条件的文档需要删除。")
                 return 0
 
+            recycle_bin_collection = None
             if recyclable:
-                # 连接到回收站集合
+                # 回收站集合复用当前集合的 MongoClient，避免为回收站新建连接
                 recycle_db = 'recycle_bin'
                 recycle_collection_name = f"{recycle_db}:{str(self.db_name) + ' ' + str(self.collection_name)}"
-                recycle_bin_collection = MongoDB(db_name=recycle_db)[recycle_collection_name]
+                recycle_bin_collection = self.collection.database.client[recycle_db][recycle_collection_name]
 
-                # 将要删除的文档移至回收站集合
-                recycle_bin_collection.save_dict_list_to_collection(dict_list=documents_to_delete)
-                logger.info(
-                    f"已将 {len(documents_to_delete)} 个文档移至回收站 {recycle_db}:{recycle_collection_name}。")
-
-            # 从原始集合中删除文档
-            with self.rlock:
-                result = self.collection.delete_many(query)
-            logger.info(f"已删除 {result.deleted_count} 个文档。")
+            deleted_count = 0
+            start_time = time.perf_counter()
+            # 只取 _id，按 _id 升序遍历；已删除的文档在游标之前，不影响后续位置
+            cursor = self.collection.find(query, projection={'_id': 1}, sort=[('_id', ASCENDING)],
+                                          skip=skip or 0, limit=limit or 0, batch_size=chunk_size)
+            try:
+                ids = []
+                for doc in cursor:
+                    ids.append(doc['_id'])
+                    if len(ids) < chunk_size:
+                        continue
+                    deleted_count += self._delete_chunk(ids, recycle_bin_collection)
+                    ids = []
+                    self._report_delete_progress(deleted_count, total, start_time, progress_callback)
+                if ids:
+                    deleted_count += self._delete_chunk(ids, recycle_bin_collection)
+                    self._report_delete_progress(deleted_count, total, start_time, progress_callback)
+            finally:
+                cursor.close()
+            if recyclable:
+                logger.info(f"已将 {deleted_count} 个文档移至回收站 {recycle_bin_collection.full_name}。")
+            logger.info(f"已删除 {deleted_count} 个文档。")
 
             # 检查集合是否为空并删除集合（如果需要）
             if drop_if_empty:
@@ -492,11 +863,47 @@ class CollectionWrapper:
                         self.collection.drop()
                         logger.info(f"集合 {self.collection_name} 已删除, 因为它是空的。")
 
-            return result.deleted_count
+            return deleted_count
         except Exception as e:
             logger.exception(f"删除文档时出错：{str(e)}")
             raise
 
+    def _delete_chunk(self, ids: list, recycle_bin_collection=None) -> int:
+        """
+        删除一块 _id 对应的文档；指定回收站时先在服务端复制，再只删除回收站中已存在的 _id
+        :return: 删除的文档数量
+        """
+        id_filter = {'_id': {'$in': ids}}
+        with self.rlock:
+            if recycle_bin_collection is not None:
+                try:
+                    self.collection.aggregate([
+                        {'$match': id_filter},
+                        {'$merge': {'into': {'db': recycle_bin_collection.database.name,
+                                             'coll': recycle_bin_collection.name},
+                                    'on': '_id', 'whenMatched': 'replace', 'whenNotMatched': 'insert'}},
+                    ])
+                except pymongo.errors.OperationFailure as e:
+                    # 服务端不支持跨库 $merge（MongoDB < 4.4）时，退化为按块批量复制
+                    logger.warning(f"$merge 移至回收站失败, 改用批量写入: {e}")
+                    operations = [ReplaceOne({'_id': doc['_id']}, doc, upsert=True)
+                                  for doc in self.collection.find(id_filter)]
+                    if operations:
+                        recycle_bin_collection.bulk_write(operations, ordered=False)
+                copied_ids = [doc['_id'] for doc in recycle_bin_collection.find(id_filter, {'_id': 1})]
+                id_filter = {'_id': {'$in': copied_ids}}
+                if not copied_ids:
+                    return 0
+            result = self.collection.delete_many(id_filter)
+        return result.deleted_count
+
+    def _report_delete_progress(self, deleted_count: int, total: int, start_time: float,
+                                progress_callback: Callable[[int, int], None] = None):
+        logger.info(f"{self.db_name}:{self.collection_name} 删除进度 {deleted_count}/{total}, "
+                    f"耗时: {time.perf_counter() - start_time:.6f} 秒")
+        if progress_callback is not None:
+            progress_callback(deleted_count, total)
+
 
 class MongoDB:
     def __init__(
@@ -507,9 +914,13 @@ class MongoDB:
             db_name: str = '',
             username: str = None,
             password: str = None,
-            log_enabled: bool = True):
+            log_enabled: bool = True,
+            max_pool_size: int = None,
+            min_pool_size: int = None,
+            validate_interval: float = 300,
+            lock_free: bool = True):
         """
-        初始化 MongoDB 连接
+        初始化 MongoDB 连接，底层 MongoClient 由 MongoClientRegistry 在进程内共享
         :param uri: uri
         :param host: MongoDB服务器地址
         :param port: MongoDB服务器端口
@@ -517,14 +928,26 @@ class MongoDB:
         :param username: 用户名
         :param password: 密码
         :param log_enabled: 是否开启日志
+        :param max_pool_size: 最大连接池大小，默认读取配置
+        :param min_pool_size: 最小连接池大小，默认读取配置
+        :param validate_interval: 集合连接校验的最小间隔（秒），间隔内重复获取集合不再访问服务器
+        :param lock_free: 集合的普通读写是否不加锁，见 CollectionWrapper
         """
         self.uri = uri
         self.host = host
         self.port = port
         self.log_enabled = log_enabled
+        self.max_pool_size = max_pool_size
+        self.min_pool_size = min_pool_size
         self.client = None
+        self._client_key = None
         self.db = None
         self.db_name = db_name
+        self.validate_interval = validate_interval
+        self.lock_free = lock_free
+        self._collections: Dict[str, CollectionWrapper] = {}  # 已缓存的集合句柄
+        self._validated_at: Dict[str, float] = {}  # 集合最近一次校验时间
+        self._collections_lock = threading.Lock()
         # 先尝试从环境变量读取，如果环境变量没有，则使用传入的参数
         self.username = os.getenv("MONGO_USERNAME", username)
         self.password = os.getenv("MONGO_PASSWORD", password)
@@ -533,7 +956,7 @@ class MongoDB:
 
     def __getitem__(self, collection_name: str) -> CollectionWrapper:
         """
-        获取指定的集合
+        获取指定的集合，集合句柄按名称缓存复用
         :param collection_name: 集合名称
         :return: 集合对象
         """
@@ -541,29 +964,48 @@ class MongoDB:
             raise Exception("数据库未选择")
         if not isinstance(collection_name, str):
             raise TypeError("collection_name 必须为字符串")
-        collection = self.db[collection_name]
+        with self._collections_lock:
+            wrapper = self._collections.get(collection_name)
+            if wrapper is None:
+                wrapper = CollectionWrapper(self.db_name, self.db[collection_name], log_enabled=self.log_enabled,
+                                            lock_free=self.lock_free)
+                self._collections[collection_name] = wrapper
+            last_validated = self._validated_at.get(collection_name)
+            need_validate = last_validated is None or time.monotonic() - last_validated >= self.validate_interval
+            if need_validate:
+                self._validated_at[collection_name] = time.monotonic()
+        if need_validate:
+            self._validate_collection(wrapper)
+        return wrapper
 
-        # 尝试获取集合统计信息以验证连接有效性
+    def _validate_collection(self, wrapper: CollectionWrapper):
+        """
+        获取集合统计信息以验证连接有效性，仅在首次获取或超过 validate_interval 后执行
+        """
         try:
-            collection_stats = collection.estimated_document_count()
+            collection_stats = wrapper.collection.estimated_document_count()
             if self.log_enabled:
-                logger.info(f"成功连接到集合 {self.db_name}:{collection_name}, 当前文档数: {collection_stats}")
+                logger.info(f"成功连接到集合 {self.db_name}:{wrapper.collection_name}, 当前文档数: {collection_stats}")
         except Exception as e:
-            logger.exception(f"无法连接到集合 {self.db_name}:{collection_name}: {e}")
+            with self._collections_lock:
+                self._validated_at.pop(wrapper.collection_name, None)  # 校验失败，下次获取时重新校验
+            logger.exception(f"无法连接到集合 {self.db_name}:{wrapper.collection_name}: {e}")
             raise
-        return CollectionWrapper(self.db_name, self.db[collection_name], log_enabled=self.log_enabled)
 
     def _connect_to_db(self):
+        pool_options = dict(max_pool_size=self.max_pool_size, min_pool_size=self.min_pool_size)
         if self.uri:
-            self.client = MongoClient(self.uri)
+            self._client_key, self.client = MongoClientRegistry.acquire(self.uri, **pool_options)
             self.db = self.client[self.db_name]
             return
         try:
             if self.username and self.password:
-                self.client = MongoClient(
-                    f"mongodb://{self.username}:{self.password}@{self.host}:{self.port}/{self.username}")
+                self._client_key, self.client = MongoClientRegistry.acquire(
+                    f"mongodb://{self.host}:{self.port}/{self.username}",
+                    username=self.username, password=self.password, **pool_options)
             else:
-                self.client = MongoClient(f"mongodb://{self.host}:{self.port}")
+                self._client_key, self.client = MongoClientRegistry.acquire(
+                    f"mongodb://{self.host}:{self.port}", **pool_options)
             if self.db_name:
                 self.db = self.client[self.db_name]
         except Exception as e:
@@ -578,16 +1020,33 @@ class MongoDB:
 
     def close(self):
         """
-        关闭与 MongoDB 的连接。
+        释放对共享 MongoClient 的引用，最后一个引用释放时才真正关闭连接。
         """
         try:
-            if self.client:
-                self.client.close()
+            if self._client_key is not None:
+                MongoClientRegistry.release(self._client_key)
+                self._client_key = None
         except Exception as e:
             logger.exception(f"关闭MongoDB连接时发生错误: {e}")
             raise
         logger.info("MongoDB 连接已关闭")
 
+    def close_writers(self):
+        """
+        写入并关闭所有已缓存集合的 BufferedWriter，任务结束时调用
+        """
+        with self._collections_lock:
+            wrappers = list(self._collections.values())
+        for wrapper in wrappers:
+            wrapper.close_writer()
+
+    @staticmethod
+    def pool_stats() -> List[dict]:
+        """
+        返回进程内所有共享 MongoClient 的连接池统计
+        """
+        return MongoClientRegistry.pool_stats()
+
 
 # 示例用法
 if __name__ == "__main__":
@@ -0,0 +1,205 @@
+#!usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@author: xyl
+@file:  RateLimit.py
+@time: 2026/10/17
+"""
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+from loguru import logger
+
+# 视为目标站点限流/过载的状态码
+THROTTLE_STATUS = (429, 503)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    解析 Retry-After 响应头，支持秒数和 HTTP 日期两种格式，返回需要等待的秒数
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class _HostState:
+    def __init__(self, rate: Optional[float], burst: float, concurrency: float):
+        self.rate = rate  # 当前令牌生成速率（次/秒），None 表示不限速
+        self.tokens = burst
+        self.updated_at = time.monotonic()
+        self.concurrency = concurrency  # 当前并发上限（AIMD 调整）
+        self.in_flight = 0
+        self.blocked_until = 0.0  # Retry-After 或限流退避截止时间（monotonic）
+        self.requests = 0
+        self.throttled = 0
+
+
+class RateLimiter:
+    """
+    按 host 的令牌桶限速 + AIMD 自适应并发
+    请求成功时并发上限线性增加（每个并发窗口 +increase），遇到 429/503/超时时乘性减小（×decrease），
+    同时令牌速率按同样规则在 [rate×min_rate_ratio, rate] 之间调整；响应带 Retry-After 时该 host 暂停到指定时间。
+    同步（线程）和异步调用方共用同一份 host 状态。
+    """
+
+    def __init__(self,
+                 rate: Optional[float] = None,
+                 burst: Optional[float] = None,
+                 max_concurrency: int = 16,
+                 min_concurrency: int = 1,
+                 increase: float = 1.0,
+                 decrease: float = 0.5,
+                 min_rate_ratio: float = 0.1,
+                 default_backoff: float = 1.0):
+        """
+        :param rate: 每个 host 每秒最多请求数，None 表示不限速只做并发控制
+        :param burst: 令牌桶容量，默认等于 max(1, rate)
+        :param max_concurrency: 每个 host 的最大并发数
+        :param min_concurrency: 每个 host 的最小并发数
+        :param increase: 加性增加步长
+        :param decrease: 乘性减小系数
+        :param min_rate_ratio: 限流后速率最低降到 rate 的比例
+        :param default_backoff: 限流且没有 Retry-After 时该 host 的暂停秒数
+        """
+        if max_concurrency < min_concurrency or min_concurrency <= 0:
+            raise ValueError("要求 0 < min_concurrency <= max_concurrency")
+        if rate is not None and rate <= 0:
+            raise ValueError("rate 必须大于0")
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate or 1.0)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.increase = increase
+        self.decrease = decrease
+        self.min_rate_ratio = min_rate_ratio
+        self.default_backoff = default_backoff
+        self._hosts: Dict[str, _HostState] = {}
+        self._cond = threading.Condition()
+
+    @staticmethod
+    def host_of(url: str) -> str:
+        return urlsplit(str(url)).netloc
+
+    def _state(self, host: str) -> _HostState:
+        # 调用方需持有 self._cond
+        state = self._hosts.get(host)
+        if state is None:
+            state = _HostState(self.rate, self.burst, float(self.max_concurrency))
+            self._hosts[host] = state
+        return state
+
+    def _try_acquire(self, host: str) -> Optional[float]:
+        """
+        尝试取得一个请求许可，调用方需持有 self._cond
+        :return: 0 表示已取得；正数表示需要等待的秒数；None 表示等待其他请求释放并发
+        """
+        state = self._state(host)
+        now = time.monotonic()
+        if now < state.blocked_until:
+            return state.blocked_until - now
+        if state.in_flight >= max(self.min_concurrency, int(state.concurrency)):
+            return None
+        if state.rate is not None:
+            state.tokens = min(self.burst, state.tokens + (now - state.updated_at) * state.rate)
+            state.updated_at = now
+            if state.tokens < 1:
+                return (1 - state.tokens) / state.rate
+            state.tokens -= 1
+        state.in_flight += 1
+        state.requests += 1
+        return 0
+
+    def _release(self, host: str):
+        with self._cond:
+            self._state(host).in_flight -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def acquire(self, url: str):
+        """
+        同步获取 url 所在 host 的请求许可，with 块结束时释放并发
+        """
+        host = self.host_of(url)
+        with self._cond:
+            while True:
+                wait = self._try_acquire(host)
+                if wait == 0:
+                    break
+                self._cond.wait(timeout=wait if wait is not None else 1.0)
+        try:
+            yield host
+        finally:
+            self._release(host)
+
+    @asynccontextmanager
+    async def aacquire(self, url: str):
+        """
+        acquire 的异步版本，等待期间不阻塞事件循环
+        """
+        host = self.host_of(url)
+        while True:
+            with self._cond:
+                wait = self._try_acquire(host)
+            if wait == 0:
+                break
+            await asyncio.sleep(min(wait, 1.0) if wait is not None else 0.05)
+        try:
+            yield host
+        finally:
+            self._release(host)
+
+    def observe(self, url: str, status_code: Optional[int] = None, retry_after: Optional[str] = None,
+                error: bool = False):
+        """
+        反馈请求结果：限流状态码或超时类错误时减小并发和速率，否则逐步恢复
+        :param status_code: 响应状态码，请求未拿到响应时为 None
+        :param retry_after: Retry-After 响应头原值
+        :param error: 是否为超时/连接类错误
+        """
+        host = self.host_of(url)
+        with self._cond:
+            state = self._state(host)
+            if error or status_code in THROTTLE_STATUS:
+                state.throttled += 1
+                state.concurrency = max(float(self.min_concurrency), state.concurrency * self.decrease)
+                if state.rate is not None:
+                    state.rate = max(self.rate * self.min_rate_ratio, state.rate * self.decrease)
+                if status_code in THROTTLE_STATUS:
+                    delay = parse_retry_after(retry_after)
+                    delay = self.default_backoff if delay is None else delay
+                    state.blocked_until = max(state.blocked_until, time.monotonic() + delay)
+                    logger.warning(f"{host} 返回 {status_code}，暂停 {delay:.1f}s，"
+                                   f"并发上限降至 {int(state.concurrency)}")
+            else:
+                state.concurrency = min(float(self.max_concurrency),
+                                        state.concurrency + self.increase / max(state.concurrency, 1.0))
+                if state.rate is not None:
+                    # 每个并发窗口恢复 rate×min_rate_ratio
+                    state.rate = min(self.rate, state.rate + self.rate * self.min_rate_ratio / max(state.concurrency, 1.0))
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, dict]:
+        """
+        各 host 当前的速率、并发上限、在途请求数及累计请求/限流次数
+        """
+        now = time.monotonic()
+        with self._cond:
+            return {host: {'rate': state.rate,
+                           'concurrency': int(state.concurrency),
+                           'in_flight': state.in_flight,
+                           'blocked_for': round(max(0.0, state.blocked_until - now), 3),
+                           'requests': state.requests,
+                           'throttled': state.throttled}
+                    for host, state in self._hosts.items()}
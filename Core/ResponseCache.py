@@ -0,0 +1,318 @@
+#!usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@author: xyl
+@file:  ResponseCache.py
+@time: 2026/10/17
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from loguru import logger
+
+INDEX_FILE = 'index.json'
+
+
+def cache_key(method: str, url: str, params: Optional[dict] = None, data: Any = None,
+              json_data: Any = None, res_type: str = 'text') -> str:
+    """
+    按请求方法、URL、查询参数、请求体和返回类型计算缓存键（sha256），参数顺序不影响结果
+    """
+    payload = json.dumps([method.upper(), url, params, data, json_data, res_type], sort_keys=True,
+                         ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def response_validators(headers) -> dict:
+    """
+    从响应头提取用于条件请求的 ETag / Last-Modified
+    """
+    validators = {}
+    for name in ('ETag', 'Last-Modified'):
+        value = headers.get(name)
+        if value:
+            validators[name] = value
+    return validators
+
+
+class CacheCounters:
+    """
+    响应缓存的命中统计；共享的 ResponseCache 除自身的累计值外，还按调用方传入的计数器分别统计（如每次任务运行一份）
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.revalidated = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'expired': self.expired,
+                'evictions': self.evictions, 'revalidated': self.revalidated,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0}
+
+
+class ResponseCache:
+    """
+    内容寻址的响应缓存，跨日期复用
+    条目文件按键的 sha256 存放在 root/ab/abcdef...，索引（大小、过期时间、类型、最近访问时间）常驻内存并持久化到 index.json，
+    查找只查内存索引，命中时读取一个文件；总大小超过 max_bytes 时按 LRU 淘汰。
+    过期条目不会立即删除：带有 ETag/Last-Modified 的条目可通过条件请求重新验证，服务端返回 304 时继续使用本地副本。
+    同一进程内同一目录应通过 acquire/release 共享一个实例，否则各实例保存索引时会互相覆盖。
+    """
+    _shared: Dict[str, dict] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, root: str, max_bytes: int = 1 << 30, ttl: Optional[float] = 86400,
+                 flush_every: int = 100):
+        """
+        :param root: 缓存目录
+        :param max_bytes: 缓存总大小上限（字节）
+        :param ttl: 默认有效期（秒），None 表示不过期
+        :param flush_every: 每多少次变更持久化一次索引
+        """
+        self.root = root
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.flush_every = flush_every
+        self._lock = threading.Lock()
+        self._index: "OrderedDict[str, dict]" = OrderedDict()  # 按最近访问排序，最早的在前
+        self._total_bytes = 0
+        self._dirty = 0
+        self.counters = CacheCounters()  # 该实例的累计统计（所有使用者合计）
+        os.makedirs(root, exist_ok=True)
+        self._load_index()
+
+    @classmethod
+    def acquire(cls, root: str, max_bytes: int = 1 << 30, ttl: Optional[float] = 86400) -> "ResponseCache":
+        """
+        获取 root 目录的共享实例，引用计数 +1；实例已存在时沿用首次创建时的 max_bytes 和 ttl
+        """
+        key = os.path.abspath(root)
+        with cls._shared_lock:
+            entry = cls._shared.get(key)
+            if entry is None:
+                entry = {'cache': cls(root, max_bytes=max_bytes, ttl=ttl), 'refs': 0}
+                cls._shared[key] = entry
+            entry['refs'] += 1
+            return entry['cache']
+
+    def release(self):
+        """
+        释放共享实例，引用计数 -1，归零时保存索引
+        """
+        key = os.path.abspath(self.root)
+        with self._shared_lock:
+            entry = self._shared.get(key)
+            if entry is not None and entry['cache'] is self:
+                entry['refs'] -= 1
+                if entry['refs'] > 0:
+                    return
+                self._shared.pop(key)
+        self.close()
+
+    def _count(self, name: str, counters: Optional[CacheCounters]):
+        # 调用方需持有 self._lock
+        setattr(self.counters, name, getattr(self.counters, name) + 1)
+        if counters is not None:
+            setattr(counters, name, getattr(counters, name) + 1)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key)
+
+    def _load_index(self):
+        index_path = os.path.join(self.root, INDEX_FILE)
+        if not os.path.exists(index_path):
+            return
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"响应缓存索引损坏，忽略: {index_path}, {e}")
+            return
+        for key, entry in sorted(entries.items(), key=lambda item: item[1].get('atime', 0)):
+            self._index[key] = entry
+            self._total_bytes += entry.get('size', 0)
+
+    def _flush_index(self):
+        # 调用方需持有 self._lock
+        index_path = os.path.join(self.root, INDEX_FILE)
+        tmp_path = f"{index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, index_path)
+        self._dirty = 0
+
+    def _mark_dirty(self):
+        # 调用方需持有 self._lock
+        self._dirty += 1
+        if self._dirty >= self.flush_every:
+            self._flush_index()
+
+    def _remove(self, key: str):
+        # 调用方需持有 self._lock
+        entry = self._index.pop(key, None)
+        if entry is None:
+            return
+        self._total_bytes -= entry.get('size', 0)
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+        self._mark_dirty()
+
+    def entry(self, key: str) -> Optional[dict]:
+        """
+        返回条目的元数据（含已过期条目），不计入命中统计
+        """
+        with self._lock:
+            entry = self._index.get(key)
+            return dict(entry) if entry is not None else None
+
+    def _read(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self._path(key), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            with self._lock:
+                self._remove(key)
+            return None
+
+    def conditional_headers(self, key: str) -> Dict[str, str]:
+        """
+        根据条目保存的 ETag/Last-Modified 生成 If-None-Match/If-Modified-Since 请求头，没有校验信息时返回空字典
+        """
+        with self._lock:
+            entry = self._index.get(key)
+            validators = entry.get('meta', {}) if entry is not None else {}
+        headers = {}
+        if validators.get('ETag'):
+            headers['If-None-Match'] = validators['ETag']
+        if validators.get('Last-Modified'):
+            headers['If-Modified-Since'] = validators['Last-Modified']
+        return headers
+
+    def revalidate(self, key: str, ttl: Optional[float] = None, meta: Optional[dict] = None,
+                   counters: Optional[CacheCounters] = None) -> Any:
+        """
+        服务端返回 304 后调用：刷新条目有效期并返回本地副本，条目已被淘汰时返回 None
+        :param ttl: 覆盖默认有效期
+        :param meta: 304 响应中新的校验信息
+        :param counters: 额外计入的统计
+        """
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                return None
+        payload = self._read(key)
+        if payload is None:
+            return None
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time()
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                return None
+            entry['atime'] = now
+            entry['expires'] = now + ttl if ttl is not None else None
+            if meta:
+                entry.setdefault('meta', {}).update(meta)
+            self._index.move_to_end(key)
+            self._count('revalidated', counters)
+            self._mark_dirty()
+        return self.decode(payload, entry['res_type'])
+
+    def get(self, key: str, counters: Optional[CacheCounters] = None) -> Any:
+        """
+        读取未过期的缓存，未命中返回 None
+        :param counters: 额外计入的统计
+        """
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                self._count('misses', counters)
+                return None
+            if entry.get('expires') is not None and entry['expires'] < time.time():
+                self._count('expired', counters)
+                self._count('misses', counters)
+                return None
+            entry['atime'] = time.time()
+            self._index.move_to_end(key)
+        payload = self._read(key)
+        with self._lock:
+            if payload is None:
+                self._count('misses', counters)
+                return None
+            self._count('hits', counters)
+        return self.decode(payload, entry['res_type'])
+
+    def put(self, key: str, res: Any, res_type: str, ttl: Optional[float] = None, meta: Optional[dict] = None,
+            counters: Optional[CacheCounters] = None):
+        """
+        写入缓存
+        :param ttl: 覆盖默认有效期
+        :param meta: 附加元数据，随索引保存
+        :param counters: 额外计入的统计（本次写入引起的淘汰）
+        """
+        payload = self.encode(res, res_type)
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time()
+        with self._lock:
+            previous = self._index.pop(key, None)
+            if previous is not None:
+                self._total_bytes -= previous.get('size', 0)
+            self._index[key] = {'size': len(payload), 'res_type': res_type, 'atime': now,
+                                'expires': now + ttl if ttl is not None else None, 'meta': meta or {}}
+            self._total_bytes += len(payload)
+            while self._total_bytes > self.max_bytes and len(self._index) > 1:
+                oldest = next(iter(self._index))
+                self._remove(oldest)
+                self._count('evictions', counters)
+            self._mark_dirty()
+
+    def invalidate(self, key: str):
+        with self._lock:
+            self._remove(key)
+
+    @staticmethod
+    def encode(res: Any, res_type: str) -> bytes:
+        if res_type == 'json':
+            return json.dumps(res, ensure_ascii=False).encode('utf-8')
+        if res_type == 'text':
+            return str(res).encode('utf-8', errors='replace')
+        if res_type == 'content':
+            return bytes(res)
+        raise ValueError(f"Invalid res_type: {res_type}")
+
+    @staticmethod
+    def decode(payload: bytes, res_type: str) -> Any:
+        if res_type == 'json':
+            return json.loads(payload)
+        if res_type == 'text':
+            return payload.decode('utf-8')
+        return payload
+
+    def stats(self, counters: Optional[CacheCounters] = None) -> Dict[str, Any]:
+        """
+        :param counters: 返回该计数器的统计，None 时返回实例的累计统计；条目数和大小始终为整个缓存的当前值
+        """
+        with self._lock:
+            return {**(counters or self.counters).to_dict(), 'entries': len(self._index), 'bytes': self._total_bytes}
+
+    def close(self):
+        with self._lock:
+            if self._dirty:
+                self._flush_index()
@@ -0,0 +1,265 @@
+#!usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@author: xyl
+@file:  Retry.py
+@time: 2026/10/17
+"""
+import asyncio
+import inspect
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple, Type
+from urllib.parse import urlsplit
+
+from loguru import logger
+
+
+class CircuitOpenError(Exception):
+    """host 的熔断器处于打开状态，请求被直接拒绝（不重试）"""
+    pass
+
+
+def is_host_failure(e: BaseException) -> bool:
+    """
+    判断异常是否说明 host 本身有问题（计入熔断）：4xx（429 除外）是请求本身的问题，不计入
+    """
+    for error in (e, *(arg for arg in e.args if isinstance(arg, BaseException))):
+        status_code = getattr(getattr(error, 'response', None), 'status_code', None)
+        if status_code is not None:
+            return status_code >= 500 or status_code == 429
+    return True
+
+
+class CircuitBreaker:
+    """
+    单个 host 的熔断器
+    closed: 正常放行，连续失败 failure_threshold 次后打开；
+    open: 拒绝所有请求，recovery_timeout 秒后进入 half_open；
+    half_open: 只放行一个探测请求，成功则关闭，失败则重新打开。
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.recovery_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self._probing = False
+            # half_open 同一时间只放行一个探测请求
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def on_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def release_probe(self):
+        # 探测请求因与 host 无关的异常结束时，允许下一个请求继续探测
+        with self._lock:
+            self._probing = False
+
+    def on_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self._probing = False
+
+
+class RetryPolicy:
+    """
+    重试策略：full jitter 指数退避 + 按 host 熔断 + 单次运行的总重试预算 + 尝试次数统计
+    同时支持同步函数（call）和协程函数（acall），一个 JobBase 实例（一次运行）一份。
+    """
+
+    def __init__(self,
+                 max_retries: int = 3,
+                 base_delay: float = 1,
+                 max_delay: float = 8,
+                 backoff: float = 2,
+                 exceptions: Tuple[Type[BaseException], ...] = (Exception,),
+                 budget: Optional[int] = None,
+                 failure_threshold: int = 5,
+                 recovery_timeout: float = 30,
+                 breaker_filter: Callable[[BaseException], bool] = is_host_failure):
+        """
+        :param max_retries: 默认重试次数
+        :param base_delay: 首次重试的退避上限（秒）
+        :param max_delay: 最大退避（秒）
+        :param backoff: 退避倍数
+        :param exceptions: 需要重试的异常类型，其余异常直接抛出
+        :param budget: 本次运行所有请求合计的最大重试次数，None 表示不限
+        :param failure_threshold: 同一 host 连续失败多少次后熔断
+        :param recovery_timeout: 熔断后多少秒进入半开状态放行探测请求
+        :param breaker_filter: 判断失败是否计入熔断
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.backoff = backoff
+        self.exceptions = exceptions
+        self.budget = budget
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.breaker_filter = breaker_filter
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+        self.metrics = {'attempts': 0, 'successes': 0, 'failures': 0, 'retries': 0, 'giveups': 0,
+                        'short_circuited': 0, 'budget_exhausted': 0}
+
+    def _incr(self, name: str):
+        with self._lock:
+            self.metrics[name] += 1
+
+    def breaker(self, url: Optional[str]) -> Optional[CircuitBreaker]:
+        if not url:
+            return None
+        host = urlsplit(str(url)).netloc
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = CircuitBreaker(self.failure_threshold, self.recovery_timeout)
+                self._breakers[host] = breaker
+            return breaker
+
+    def compute_delay(self, attempt: int) -> float:
+        """
+        full jitter：在 [0, min(max_delay, base_delay × backoff^attempt)] 内均匀随机，避免多个线程同步重试
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * (self.backoff ** attempt)))
+
+    def _take_budget(self) -> bool:
+        with self._lock:
+            if self.budget is None:
+                return True
+            if self.budget <= 0:
+                self.metrics['budget_exhausted'] += 1
+                return False
+            self.budget -= 1
+            return True
+
+    def _before_attempt(self, breaker: Optional[CircuitBreaker], name: str, url: Optional[str]):
+        if breaker is not None and not breaker.allow():
+            self._incr('short_circuited')
+            raise CircuitOpenError(f"{name} circuit open for {urlsplit(str(url)).netloc}, url: {url}")
+        self._incr('attempts')
+
+    def _on_error(self, e: BaseException, breaker: Optional[CircuitBreaker], attempt: int, retries: int,
+                  name: str, url: Optional[str]) -> Optional[float]:
+        """
+        处理一次失败，返回下次重试前的等待秒数；不再重试时返回 None
+        """
+        if not isinstance(e, self.exceptions):
+            logger.critical(f"[UNEXPECTED ERROR] Attempt {attempt + 1} failed: {str(e)}, url: {url} ")
+            if breaker is not None:
+                breaker.release_probe()
+            return None
+        self._incr('failures')
+        if breaker is not None:
+            if self.breaker_filter(e):
+                breaker.on_failure()
+            else:
+                breaker.release_probe()
+        if attempt >= retries or not self._take_budget():
+            self._incr('giveups')
+            logger.error(f"[FINAL FAILURE] {name} after {attempt} retries, failed: {str(e)}, url: {url} ")
+            return None
+        self._incr('retries')
+        sleep_time = self.compute_delay(attempt)
+        logger.error(f"[Failure] {name} Attempt {attempt + 1} failed: {str(e)}, url: {url}, "
+                     f"retrying in {sleep_time:.2f}s...")
+        return sleep_time
+
+    def _on_success(self, breaker: Optional[CircuitBreaker], attempt: int, name: str, url: Optional[str]):
+        self._incr('successes')
+        if breaker is not None:
+            breaker.on_success()
+        logger.debug(f"[Success] {name} Attempt {attempt + 1} success, url: {url}")
+
+    def call(self, func: Callable, args: tuple = (), kwargs: Optional[dict] = None, url: Optional[str] = None,
+             retries: Optional[int] = None):
+        """
+        按策略执行同步函数 func(*args, **kwargs)
+        :param url: 用于按 host 熔断及日志，None 时不熔断
+        :param retries: 覆盖默认重试次数
+        """
+        retries = self.max_retries if retries is None else retries
+        kwargs = kwargs or {}
+        breaker = self.breaker(url)
+        name = getattr(func, '__name__', repr(func))
+        attempt = 0
+        while True:
+            self._before_attempt(breaker, name, url)
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                sleep_time = self._on_error(e, breaker, attempt, retries, name, url)
+                if sleep_time is None:
+                    raise
+                time.sleep(sleep_time)
+                attempt += 1
+                continue
+            self._on_success(breaker, attempt, name, url)
+            return result
+
+    async def acall(self, func: Callable, args: tuple = (), kwargs: Optional[dict] = None, url: Optional[str] = None,
+                    retries: Optional[int] = None):
+        """
+        call 的异步版本，func 为协程函数，退避期间不阻塞事件循环
+        """
+        retries = self.max_retries if retries is None else retries
+        kwargs = kwargs or {}
+        breaker = self.breaker(url)
+        name = getattr(func, '__name__', repr(func))
+        attempt = 0
+        while True:
+            self._before_attempt(breaker, name, url)
+            try:
+                result = await func(*args, **kwargs)
+            except Exception as e:
+                sleep_time = self._on_error(e, breaker, attempt, retries, name, url)
+                if sleep_time is None:
+                    raise
+                await asyncio.sleep(sleep_time)
+                attempt += 1
+                continue
+            self._on_success(breaker, attempt, name, url)
+            return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.metrics)
+            stats['budget_left'] = self.budget
+            stats['circuits'] = {host: breaker.state for host, breaker in self._breakers.items()}
+        return stats
+
+
+def request_url(func: Callable, args: tuple, kwargs: dict) -> Optional[str]:
+    """
+    按函数签名绑定参数后取 url 参数，位置参数和关键字参数均可
+    """
+    try:
+        return inspect.signature(func).bind_partial(*args, **kwargs).arguments.get('url')
+    except TypeError:
+        return None
@@ -15,6 +15,7 @@ from apscheduler.triggers.cron import CronTrigger
 from watchdog.events import FileSystemEventHandler
 
 from Core import save_jobs, auto_import_jobs
+from Core.AsyncMongoDB import AsyncCollectionWrapper
 from Core.Config import MODULE_PATTERN, MONGO_URI, DB_NAME
 from Core.MongoDB import MongoDB
 from Core.Service import start_async_job
@@ -24,7 +25,7 @@ class JobScheduler:
     def __init__(self):
         self.scheduler = AsyncIOScheduler()
         self.db = MongoDB(uri=MONGO_URI, db_name=DB_NAME)
-        self.Job_c = self.db['Job']
+        self.Job_c = AsyncCollectionWrapper(self.db['Job'])
         self._current_jobs: Dict[str, dict] = {}
 
     async def start(self):
@@ -44,7 +45,7 @@ class JobScheduler:
         """定时刷新Job"""
         while True:
             await asyncio.sleep(60)
-            save_jobs()
+            await asyncio.get_running_loop().run_in_executor(None, save_jobs)
 
     async def _monitor_job_changes(self):
         """周期性检查任务变更"""
@@ -57,7 +58,7 @@ class JobScheduler:
     async def _update_scheduler(self):
         """更新调度器中的任务"""
         # 获取数据库中所有启用的任务
-        db_jobs = {j['JobId']: j for j in self.Job_c.find_documents({"Disabled": 0}).dict()}
+        db_jobs = {j['JobId']: j for j in (await self.Job_c.find_documents({"Disabled": 0})).dict()}
 
         # 检查新增或修改的任务
         for job_id, job in db_jobs.items():
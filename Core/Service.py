@@ -13,7 +13,7 @@ from fastapi import HTTPException
 from loguru import logger
 
 import Core
-from Core import Job_c, History_c
+from Core import AsyncJob_c, AsyncHistory_c
 from Core.Collection import Job, History, JobStatus
 
 
@@ -77,7 +77,7 @@ async def get_statistics(days: int = 7) -> Optional[dict]:
             "$sort": {"date": 1}
         }
     ]
-    statistics = History_c.aggregate(pipeline=pipeline)
+    statistics = await AsyncHistory_c.aggregate(pipeline=pipeline)
     statistics_dict = {stat['date']: stat for stat in statistics}
     result = [
         statistics_dict.get(date, {
@@ -104,42 +104,42 @@ async def get_statistics(days: int = 7) -> Optional[dict]:
 
 # CRUD操作
 async def get_job(job_id: int) -> Optional[dict]:
-    return Job_c.find_documents(query={"JobId": job_id}, limit=1).dict(0)
+    return (await AsyncJob_c.find_documents(query={"JobId": job_id}, limit=1)).dict(0)
 
 
 async def get_jobs_count(query: dict = None):
-    return Job_c.count(query=query)
+    return await AsyncJob_c.count(query=query)
 
 
 async def get_jobs(current_page: int = 1, page_size: int = 10, filters=None) -> List[dict]:
     if filters is None:
         filters = {}
-    return Job_c.find_documents(query=filters, sort=[("JobId", -1)], limit=page_size,
-                                skip=(current_page - 1) * page_size).dict()
+    return (await AsyncJob_c.find_documents(query=filters, sort=[("JobId", -1)], limit=page_size,
+                                            skip=(current_page - 1) * page_size)).dict()
 
 
 async def create_job(job: Job) -> dict:
     if await get_job(job.JobId):
         raise HTTPException(status_code=400, detail="Job ID already exists")
     job_dict = job.dict()
-    Job_c.save_dict_to_collection(job_dict)
+    await AsyncJob_c.save_dict_to_collection(job_dict)
     return job_dict
 
 
 async def update_job(job_id: int, job: Job) -> dict:
-    result_count = Job_c.save_dict_to_collection(job.dict(), 'JobId')
+    result_count = await AsyncJob_c.save_dict_to_collection(job.dict(), 'JobId')
     if result_count == 0:
         raise HTTPException(status_code=404, detail="Job not found")
     return await get_job(job_id)
 
 
 async def delete_job(job_id: int) -> bool:
-    deleted_count = Job_c.delete_documents(query={"JobId": job_id})
+    deleted_count = await AsyncJob_c.delete_documents(query={"JobId": job_id})
     return deleted_count > 0
 
 
 async def create_run_log(log: History) -> dict:
-    History_c.save_dict_to_collection(log.dict())
+    await AsyncHistory_c.save_dict_to_collection(log.dict())
     return log.dict()
 
 
@@ -149,7 +149,7 @@ async def get_job_logs_count(job_id: int = None, filters: dict = None) -> int:
         query["JobId"] = job_id
     if filters:
         query.update(filters)
-    return History_c.count(query=query)
+    return await AsyncHistory_c.count(query=query)
 
 
 async def get_job_logs(job_id: int = None, current_page: int = 1, page_size: int = 10, filters=None) -> List[dict]:
@@ -159,7 +159,8 @@ async def get_job_logs(job_id: int = None, current_page: int = 1, page_size: int
         query["JobId"] = job_id
     if filters:
         query.update(filters)
-    return History_c.find_documents(query=query, sort=[("StartTime", -1)], limit=page_size, skip=skip).dict()
+    return (await AsyncHistory_c.find_documents(query=query, sort=[("StartTime", -1)], limit=page_size,
+                                                skip=skip)).dict()
 
 
 def start_async_job(job_id):
@@ -0,0 +1,68 @@
+#!usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@author: xyl
+@file:  SingleFlight.py
+@time: 2026/10/17
+"""
+import copy
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    请求合并：同一个 key 同一时间只执行一次，其余线程等待并共享结果（或异常）
+    func 应包含完整的重试逻辑，等待者直接拿到最终结果，不再各自计入重试统计
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.executed = 0  # 实际执行次数
+        self.coalesced = 0  # 合并掉（节省）的执行次数
+
+    def do(self, key: Hashable, func: Callable, *args, **kwargs) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return self._copy(call.result)
+        try:
+            call.result = func(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                shared = call.waiters > 0
+            call.done.set()
+        # 有等待者时 call.result 只供复制，执行者也拿副本，避免它修改结果时与等待者的复制竞争
+        return self._copy(call.result) if shared else call.result
+
+    @staticmethod
+    def _copy(result: Any) -> Any:
+        # dict/list 结果复制一份，避免多个调用方修改同一个对象
+        return copy.deepcopy(result) if isinstance(result, (dict, list)) else result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'executed': self.executed, 'coalesced': self.coalesced, 'in_flight': len(self._calls)}
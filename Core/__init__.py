@@ -12,8 +12,10 @@ import os
 import sys
 import traceback
 
+from Core.AsyncMongoDB import AsyncCollectionWrapper
 from Core.Collection import Job, JobStatus, History
 from Core.Config import *
+from Core.Index import ensure_indexes
 from Core.JobBase import JobBase
 from Core.JobRunner import JobRunner
 from Core.MongoDB import MongoDB
@@ -21,6 +23,9 @@ from Core.MongoDB import MongoDB
 db = MongoDB(uri=MONGO_URI, db_name=DB_NAME)
 Job_c = db['Job']
 History_c = db['History']
+# 供 FastAPI 服务和调度器在事件循环中使用的异步集合
+AsyncJob_c = AsyncCollectionWrapper(Job_c)
+AsyncHistory_c = AsyncCollectionWrapper(History_c)
 
 
 def run(job_id):
@@ -91,7 +96,10 @@ save_jobs()
 __all__ = [
     'Job_c',
     'History_c',
+    'AsyncJob_c',
+    'AsyncHistory_c',
     'run',
     'auto_import_jobs',
-    'save_jobs'
+    'save_jobs',
+    'ensure_indexes'
 ]
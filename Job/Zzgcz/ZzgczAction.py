@@ -13,6 +13,7 @@ from Core.JobBase import JobBase
 class ZzgczAction(JobBase):
     job_id = [700001, 700002]
     folder = os.path.dirname(os.path.abspath(__file__))
+    indexes = {'pages': [[('id', 1)]]}
 
     def __init__(self, *args, **kwargs):
         super(self.__class__, self).__init__(*args, **kwargs)
@@ -15,6 +15,7 @@ from starlette.middleware.cors import CORSMiddleware
 from typing import Dict, Optional
 from watchdog.observers import Observer
 
+from Core import db, ensure_indexes
 from Core.Config import BASE_PACKAGE
 from Core.Collection import PageInt, JobIdInt, PageSizeInt, Job
 from Core.Result import Result, SuccessResult, ErrorResult
@@ -35,6 +36,8 @@ observer = Observer()
 # 生命周期管理
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # 启动时幂等创建所有声明的索引（不在导入 Core 时执行，python -m Core.Index report 才能看到缺失的索引）
+    ensure_indexes(db.client)
     observer.schedule(JobFileHandler(), path=BASE_PACKAGE, recursive=True)
     observer.start()
     await job_scheduler.start()
@@ -1,5 +1,6 @@
 import Core
 
 if __name__ == '__main__':
+    Core.ensure_indexes(Core.db.client)
     job_id = 100015
     Core.run(job_id=job_id)
@@ -0,0 +1,112 @@
+#!usr/bin/env python
+# -*- coding:utf-8 -*-
+"""
+@author: xyl
+@file:  test_async_fetcher.py
+@time: 2026/10/17
+"""
+# fetch_many / afetch_many 对本地 HTTP 服务端的端到端测试
+# 用法: python -m pytest tests  （JobBase 需要 config.yaml 中配置的 MongoDB，不可用时跳过）
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from pymongo.errors import PyMongoError
+
+try:
+    # 导入 Core 时会连接 MongoDB
+    from Core.JobBase import JobBase
+except PyMongoError as e:
+    pytest.skip(f"MongoDB 不可用: {e}", allow_module_level=True)
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    hits = []
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        with self.lock:
+            Handler.hits.append(self.path)
+        if self.path.startswith('/missing'):
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        if self.path.startswith('/json'):
+            body, content_type = json.dumps({'path': self.path}).encode('utf-8'), 'application/json'
+        else:
+            body = '<html><head><meta charset="gbk"></head><body>招标公告</body></html>'.encode('gbk')
+            content_type = 'text/html'
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FetchTestJob(JobBase):
+    job_id = 990001
+
+    def on_run(self):
+        pass
+
+
+@pytest.fixture(scope='module')
+def base_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def job(tmp_path):
+    Handler.hits.clear()
+    job = FetchTestJob(job_id=990001, run_id=100001, folder=str(tmp_path))
+    job.retry_policy.base_delay = 0.01
+    yield job
+    job.close()
+
+
+def test_fetch_many_results_and_dumps(job, base_url):
+    specs = [{'url': f'{base_url}/json/{i}', 'res_type': 'json', 'dump_file_name': f'{i}.json'} for i in range(20)]
+    specs.append({'url': f'{base_url}/page', 'dump_file_name': 'page.html'})
+    results = list(job.fetch_many(specs, concurrency=4))
+    assert len(results) == len(specs)
+    assert all(error is None for _, _, error in results)
+    by_url = {spec['url']: result for spec, result, _ in results}
+    assert by_url[f'{base_url}/json/3'] == {'path': '/json/3'}
+    assert '招标公告' in by_url[f'{base_url}/page']
+    assert job.get_dump('3.json') == {'path': '/json/3'}
+    # 第二次全部读取 dump，不再请求服务端
+    hits = len(Handler.hits)
+    again = list(job.fetch_many(specs))
+    assert all(error is None for _, _, error in again)
+    assert len(Handler.hits) == hits
+
+
+def test_fetch_many_accepts_transport_and_reports_errors(job, base_url):
+    specs = [{'url': f'{base_url}/json/h2', 'res_type': 'json', 'transport': 'h2'},
+             {'url': f'{base_url}/missing', 'retry_count': 0},
+             {'url': f'{base_url}/json/bad', 'transport': 'http3'}]
+    results = {spec['url']: (result, error) for spec, result, error in job.fetch_many(specs)}
+    assert results[f'{base_url}/json/h2'] == ({'path': '/json/h2'}, None)
+    assert results[f'{base_url}/missing'][1] is not None
+    assert isinstance(results[f'{base_url}/json/bad'][1], ValueError)
+
+
+def test_afetch_many(job, base_url):
+    async def collect():
+        return [item async for item in job.afetch_many((f'{base_url}/json/{i}' for i in range(10)), concurrency=3)]
+
+    results = asyncio.run(collect())
+    assert sorted(json.loads(result)['path'] for _, result, _ in results) == [f'/json/{i}' for i in range(10)]
+    assert len(Handler.hits) == 10